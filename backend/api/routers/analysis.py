@@ -1,15 +1,124 @@
-from fastapi import APIRouter, HTTPException, Path
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Path, Query, Request
+from fastapi.responses import StreamingResponse, JSONResponse, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any, Optional, Callable, Iterator, List, Tuple
 import uuid
+import json
+import hashlib
 import traceback
 import pandas as pd
 from api.routers.upload import sessions
+from services.data_processor import convert_numpy_types
+from services.correlation_engine import CORRELATION_METHODS, CORRELATION_MODES
+from services.outlier_engine import OUTLIER_METHODS
+from services.datetime_engine import TIME_GRANULARITIES
+from services.filter_engine import request_filters
+from services.groupby_engine import groupby_request
 
 router = APIRouter()
 
+# Tables with more rows than this are first analyzed on a sample of this size when streaming
+STREAM_SAMPLE_ROWS = 50000
+
+def format_column_stats(column_stats_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Transform column stats to the array format expected by the frontend"""
+    column_stats = []
+    for col_name, stats in column_stats_dict.items():
+        stat_item = {
+            "column": col_name,
+            "dtype": stats.get("dtype", "unknown"),
+            "missing": stats.get("null_count", 0),
+            "unique": stats.get("unique_count", 0),
+            "mean": stats.get("mean"),
+            "mode": None  # We can add mode calculation if needed
+        }
+        # For categorical columns, get the most frequent value as mode
+        if stats.get("column_type") == "categorical" and stats.get("top_values"):
+            stat_item["mode"] = stats["top_values"][0]["value"] if stats["top_values"] else None
+        column_stats.append(stat_item)
+    return column_stats
+
+def analysis_overview(session_id: str, basic_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Top level fields of an analysis response"""
+    return {
+        "session_id": session_id,
+        "filename": basic_info.get("filename", "unknown.csv"),
+        "rows": basic_info["rows"],
+        "columns": basic_info["columns"],
+        "file_size": basic_info.get("file_size_mb", 0),
+        "basic_info": basic_info
+    }
+
+def analysis_sections(processor, approximate: bool) -> List[Tuple[str, Callable[[], Any]]]:
+    """The expensive analysis sections, in the order the dashboard renders them"""
+    return [
+        ("column_stats", lambda: format_column_stats(processor.get_column_stats(approximate=approximate))),
+        ("correlations", processor.compute_correlations),
+        ("patterns", lambda: processor.detect_patterns_and_anomalies(approximate=approximate)),
+        ("distributions", lambda: processor.get_value_distributions(approximate=approximate))
+    ]
+
+def _sse_event(event: str, payload: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(convert_numpy_types(payload), default=str)}\n\n"
+
+def stream_analysis_events(session_id: str, processor, approximate: bool) -> Iterator[str]:
+    """Yield analysis sections as server-sent events: a sample pass first on large tables, then the full data"""
+    try:
+        basic_info = processor.get_basic_info()
+        yield _sse_event("section", {"section": "overview", "stage": "full",
+                                     "data": analysis_overview(session_id, basic_info)})
+        yield _sse_event("section", {"section": "sample", "stage": "full",
+                                     "data": processor.get_data_sample(n=100)})
+        
+        stages = []
+        preview = processor.sample_view(STREAM_SAMPLE_ROWS) if hasattr(processor, "sample_view") else None
+        if preview is not None:
+            stages.append(("sample", preview))
+        stages.append(("full", processor))
+        
+        for stage, source in stages:
+            for section, compute in analysis_sections(source, approximate):
+                payload = {"section": section, "stage": stage, "data": compute()}
+                if stage == "sample":
+                    payload["sample_rows"] = STREAM_SAMPLE_ROWS
+                yield _sse_event("section", payload)
+        yield _sse_event("done", {"approximate": approximate})
+    except Exception as e:
+        print(f"Error in analysis stream: {str(e)}")
+        print(f"Traceback: {traceback.format_exc()}")
+        yield _sse_event("failed", {"detail": f"Analysis failed: {str(e)}"})
+
+async def section_response(request: Request, session_id: str, section: str,
+                           compute: Callable[[Any], Any], **params) -> Response:
+    """Serve one analysis section, answering revalidations from its ETag without recomputing it"""
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    session = sessions[session_id]
+    # Datasets never change, so a section is fixed by the dataset, sheet and arguments
+    key = json.dumps([session["file_hash"], session.get("active_sheet"), section, params], default=str)
+    etag = f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+    # Sheet switches change the content behind the same URL, so clients must revalidate
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        data = await run_in_threadpool(compute, session["processor"])
+        # Encoding fails on values the converters do not know, so it is part of the handled path
+        return JSONResponse(jsonable_encoder(convert_numpy_types(data)), headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in {section} analysis: {str(e)}")
+        print(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
 @router.get("/{session_id}")
-async def get_analysis(session_id: str = Path(...)):
-    """Get comprehensive analysis for a session"""
+async def get_analysis(session_id: str = Path(...), approximate: bool = False):
+    """Get comprehensive analysis for a session; approximate estimates distinct counts, quantiles and top values from sketches"""
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -21,55 +130,235 @@ async def get_analysis(session_id: str = Path(...)):
         basic_info = processor.get_basic_info()
         print(f"Basic info: {basic_info}")
         
-        column_stats_dict = processor.get_column_stats()
+        column_stats = format_column_stats(processor.get_column_stats(approximate=approximate))
         print(f"Column stats retrieved")
         
-        # Transform column_stats to array format expected by frontend
-        column_stats = []
-        for col_name, stats in column_stats_dict.items():
-            stat_item = {
-                "column": col_name,
-                "dtype": stats.get("dtype", "unknown"),
-                "missing": stats.get("null_count", 0),
-                "unique": stats.get("unique_count", 0),
-                "mean": stats.get("mean"),
-                "mode": None  # We can add mode calculation if needed
-            }
-            # For categorical columns, get the most frequent value as mode
-            if stats.get("column_type") == "categorical" and stats.get("top_values"):
-                stat_item["mode"] = stats["top_values"][0]["value"] if stats["top_values"] else None
-            column_stats.append(stat_item)
-        
         correlations = processor.compute_correlations()
         print(f"Correlations retrieved")
         
         sample = processor.get_data_sample(n=100)
         print(f"Sample retrieved")
         
-        patterns = processor.detect_patterns_and_anomalies()
+        patterns = processor.detect_patterns_and_anomalies(approximate=approximate)
         print(f"Patterns detected")
         
-        distributions = processor.get_value_distributions()
+        distributions = processor.get_value_distributions(approximate=approximate)
         print(f"Distributions calculated")
         
         return {
-            "session_id": session_id,
-            "filename": basic_info.get("filename", "unknown.csv"),
-            "rows": basic_info["rows"],
-            "columns": basic_info["columns"],
-            "file_size": basic_info.get("file_size_mb", 0),
+            **analysis_overview(session_id, basic_info),
             "column_stats": column_stats,
             "correlations": correlations,
             "sample": sample,
             "patterns": patterns,
             "distributions": distributions,
-            "basic_info": basic_info
+            "approximate": approximate
         }
     except Exception as e:
         print(f"Error in analysis: {str(e)}")
         print(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@router.get("/{session_id}/stream")
+async def stream_analysis(session_id: str = Path(...), approximate: bool = False):
+    """Stream the analysis as server-sent events, one section at a time"""
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    processor = sessions[session_id]["processor"]
+    # A sync generator is iterated in the threadpool, keeping the event loop free
+    return StreamingResponse(
+        stream_analysis_events(session_id, processor, approximate),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{session_id}/summary")
+async def get_analysis_summary(request: Request, session_id: str = Path(...)):
+    """Get the dataset overview: size, shape and basic info"""
+    return await section_response(request, session_id, "summary",
+                                  lambda processor: analysis_overview(session_id, processor.get_basic_info()))
+
+@router.get("/{session_id}/columns")
+async def get_analysis_columns(request: Request, session_id: str = Path(...), approximate: bool = False):
+    """Get per-column statistics"""
+    return await section_response(
+        request, session_id, "columns",
+        lambda processor: format_column_stats(processor.get_column_stats(approximate=approximate)),
+        approximate=approximate)
+
+@router.get("/{session_id}/correlations")
+async def get_analysis_correlations(request: Request, session_id: str = Path(...),
+                                    method: str = "pearson", mode: str = "matrix",
+                                    top_k: Optional[int] = Query(None, ge=1),
+                                    threshold: float = Query(0.0, ge=0.0, le=1.0)):
+    """Get correlations of the numeric columns: nested matrix, compact arrays or the strongest pairs"""
+    if method not in CORRELATION_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported correlation method: {method}")
+    if mode not in CORRELATION_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported correlation mode: {mode}")
+    return await section_response(
+        request, session_id, "correlations",
+        lambda processor: processor.get_correlations(method=method, mode=mode, top_k=top_k,
+                                                     threshold=threshold),
+        method=method, mode=mode, top_k=top_k, threshold=threshold)
+
+@router.get("/{session_id}/sample")
+async def get_analysis_sample(request: Request, session_id: str = Path(...),
+                              n: int = Query(100, ge=1, le=1000)):
+    """Get the first n rows"""
+    return await section_response(request, session_id, "sample",
+                                  lambda processor: processor.get_data_sample(n=n), n=n)
+
+@router.get("/{session_id}/patterns")
+async def get_analysis_patterns(request: Request, session_id: str = Path(...), approximate: bool = False):
+    """Get missing data, outliers and data quality findings"""
+    return await section_response(
+        request, session_id, "patterns",
+        lambda processor: processor.detect_patterns_and_anomalies(approximate=approximate),
+        approximate=approximate)
+
+@router.get("/{session_id}/outliers")
+async def get_analysis_outliers(request: Request, session_id: str = Path(...), method: str = "iqr"):
+    """Get outlier bounds and counts of every numeric column by the iqr, zscore or mad method"""
+    if method not in OUTLIER_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported outlier method: {method}")
+    
+    def compute(processor):
+        try:
+            return processor.get_outliers(method=method)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return await section_response(request, session_id, "outliers", compute, method=method)
+
+@router.get("/{session_id}/outliers/{column}/rows")
+async def get_analysis_outlier_rows(request: Request, session_id: str = Path(...), column: str = Path(...),
+                                    method: str = "iqr", offset: int = Query(0, ge=0),
+                                    limit: int = Query(100, ge=1, le=1000)):
+    """Get a page of the row positions and values of a column's outliers"""
+    if method not in OUTLIER_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unsupported outlier method: {method}")
+    
+    def compute(processor):
+        names = {str(col): col for col in processor.df.columns}
+        if column not in names:
+            raise HTTPException(status_code=404, detail=f"Column '{column}' not found")
+        try:
+            return processor.get_outlier_rows(names[column], method=method, offset=offset, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return await section_response(request, session_id, "outlier_rows", compute,
+                                  column=column, method=method, offset=offset, limit=limit)
+
+@router.get("/{session_id}/duplicates")
+async def get_analysis_duplicates(request: Request, session_id: str = Path(...), columns: Optional[str] = None,
+                                  offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=1000)):
+    """Get a page of the groups of identical rows, over all columns or a comma separated subset"""
+    requested = [col.strip() for col in columns.split(",") if col.strip()] if columns else None
+    
+    def compute(processor):
+        selected = None
+        if requested is not None:
+            names = {str(col): col for col in processor.df.columns}
+            missing = [col for col in requested if col not in names]
+            if missing:
+                raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(missing)}")
+            selected = tuple(names[col] for col in requested)
+        try:
+            return processor.get_duplicates(selected, offset=offset, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return await section_response(request, session_id, "duplicates", compute,
+                                  columns=requested, offset=offset, limit=limit)
+
+@router.get("/{session_id}/groups/rows")
+async def get_analysis_group_rows(request: Request, session_id: str = Path(...), group_by: str = Query(...),
+                                  group: Optional[int] = Query(None, ge=0), value: Optional[List[str]] = Query(None),
+                                  columns: Optional[str] = None, offset: int = Query(0, ge=0),
+                                  limit: int = Query(100, ge=1, le=1000)):
+    """Get a page of the rows of one group, by its number in the group-by result or its key values"""
+    keys = [col.strip() for col in group_by.split(",") if col.strip()]
+    projected = [col.strip() for col in columns.split(",") if col.strip()] if columns else None
+    
+    def compute(processor):
+        names = {str(col): col for col in processor.df.columns}
+        unknown = [col for col in keys + (projected or []) if col not in names]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+        try:
+            return processor.get_group_rows(tuple(names[col] for col in keys), group=group,
+                                            values=tuple(value) if value else None,
+                                            columns=tuple(names[col] for col in projected) if projected else None,
+                                            offset=offset, limit=limit)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=str(e.args[0]))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return await section_response(request, session_id, "group_rows", compute, group_by=keys, group=group,
+                                  value=value, columns=projected, offset=offset, limit=limit)
+
+@router.get("/{session_id}/distributions")
+async def get_analysis_distributions(request: Request, session_id: str = Path(...),
+                                     columns: Optional[str] = None, approximate: bool = False,
+                                     compact: bool = False):
+    """Get value distributions, of every column or only a comma separated list of them"""
+    requested = [col.strip() for col in columns.split(",") if col.strip()] if columns else None
+    
+    def compute(processor):
+        if requested is None:
+            return processor.get_value_distributions(approximate=approximate, compact=compact)
+        # Query strings are text, so match against the names as strings
+        names = {str(col): col for col in processor.df.columns}
+        missing = [col for col in requested if col not in names]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(missing)}")
+        return processor.get_value_distributions(approximate=approximate, compact=compact,
+                                                 columns=tuple(names[col] for col in requested))
+    
+    return await section_response(request, session_id, "distributions", compute,
+                                  columns=requested, approximate=approximate, compact=compact)
+
+@router.get("/{session_id}/distribution/{column}")
+async def get_analysis_distribution(request: Request, session_id: str = Path(...), column: str = Path(...),
+                                    bins: int = Query(20, ge=1, le=500), approximate: bool = False):
+    """Get the value distribution of a single column"""
+    def compute(processor):
+        names = {str(col): col for col in processor.df.columns}
+        if column not in names:
+            raise HTTPException(status_code=404, detail=f"Column '{column}' not found")
+        return processor.get_value_distribution(names[column], bins=bins, approximate=approximate)
+    
+    return await section_response(request, session_id, "distribution", compute,
+                                  column=column, bins=bins, approximate=approximate)
+
+@router.get("/{session_id}/timeseries/{column}")
+async def get_analysis_timeseries(request: Request, session_id: str = Path(...), column: str = Path(...),
+                                  granularity: str = "auto", values: Optional[str] = None):
+    """Get row counts and numeric aggregates per time bucket of a date column"""
+    if granularity != "auto" and granularity not in TIME_GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"Unsupported granularity: {granularity}")
+    requested = [col.strip() for col in values.split(",") if col.strip()] if values is not None else None
+    
+    def compute(processor):
+        names = {str(col): col for col in processor.df.columns}
+        if column not in names:
+            raise HTTPException(status_code=404, detail=f"Column '{column}' not found")
+        missing = [col for col in requested or [] if col not in names]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(missing)}")
+        try:
+            return processor.get_time_series(names[column], granularity=granularity,
+                                             values=None if requested is None else tuple(names[col] for col in requested))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return await section_response(request, session_id, "timeseries", compute,
+                                  column=column, granularity=granularity, values=requested)
+
 @router.post("/{session_id}/custom")
 async def custom_analysis(
     session_id: str,
@@ -86,66 +375,17 @@ async def custom_analysis(
         
         if analysis_type == "filter":
             # Filter data based on conditions
-            filters = query.get("filters", [])
-            
-            # Support both single filter (backward compatibility) and multiple filters
-            if not filters:
-                # Check if it's a single filter (old format)
-                column = query.get("column")
-                operator = query.get("operator", "=")
-                value = query.get("value")
-                if column and value is not None:
-                    filters = [{"column": column, "operator": operator, "value": value}]
+            filters = request_filters(query)
             
             if filters:
-                df = processor.df
-                filtered = df.copy()
-                
-                for filter_item in filters:
-                    column = filter_item.get("column")
-                    operator = filter_item.get("operator", "=")
-                    value = filter_item.get("value")
-                    
-                    if column and value is not None:
-                        try:
-                            # Handle text operators
-                            if operator == "=":
-                                # Convert both sides to string for text comparison
-                                filtered = filtered[filtered[column].astype(str) == str(value)]
-                            elif operator == "!=":
-                                filtered = filtered[filtered[column].astype(str) != str(value)]
-                            elif operator == "contains":
-                                filtered = filtered[filtered[column].astype(str).str.contains(str(value), case=False, na=False)]
-                            elif operator == "starts with":
-                                filtered = filtered[filtered[column].astype(str).str.startswith(str(value), na=False)]
-                            elif operator == "ends with":
-                                filtered = filtered[filtered[column].astype(str).str.endswith(str(value), na=False)]
-                            # Numeric operators
-                            elif operator in [">", "<", ">=", "<="]:
-                                # Try to convert to numeric if possible
-                                try:
-                                    numeric_value = float(value)
-                                    if operator == ">":
-                                        filtered = filtered[filtered[column] > numeric_value]
-                                    elif operator == "<":
-                                        filtered = filtered[filtered[column] < numeric_value]
-                                    elif operator == ">=":
-                                        filtered = filtered[filtered[column] >= numeric_value]
-                                    elif operator == "<=":
-                                        filtered = filtered[filtered[column] <= numeric_value]
-                                except (ValueError, TypeError):
-                                    # If conversion fails, skip this filter
-                                    continue
-                        except Exception as e:
-                            print(f"Error applying filter on column {column}: {str(e)}")
-                            continue
+                total = processor.row_count()
+                positions = processor.filter_rows(filters)
                 
                 # Always return a valid response, even if no matches
-                from services.data_processor import convert_numpy_types
-                sample_data = filtered.head(100).to_dict('records') if len(filtered) > 0 else []
+                sample_data = processor.take_rows(positions[:100]).to_dict('records') if len(positions) > 0 else []
                 return {
-                    "rows_matched": len(filtered),
-                    "percentage": (len(filtered) / len(df)) * 100 if len(df) > 0 else 0,
+                    "rows_matched": len(positions),
+                    "percentage": (len(positions) / total) * 100 if total > 0 else 0,
                     "sample": convert_numpy_types(sample_data)
                 }
             else:
@@ -158,34 +398,20 @@ async def custom_analysis(
         
         elif analysis_type == "groupby":
             # Group by analysis
-            group_column = query.get("group_column")
-            agg_column = query.get("agg_column")
-            agg_func = query.get("agg_func", "mean")
+            keys, aggregates = groupby_request(query)
             
-            if group_column:
-                df = processor.df
-                
-                if agg_func == "mean" and agg_column:
-                    result = df.groupby(group_column)[agg_column].mean().reset_index()
-                elif agg_func == "sum" and agg_column:
-                    result = df.groupby(group_column)[agg_column].sum().reset_index()
-                elif agg_func == "count":
-                    result = df.groupby(group_column).size().reset_index(name='count')
-                elif agg_func == "max" and agg_column:
-                    result = df.groupby(group_column)[agg_column].max().reset_index()
-                elif agg_func == "min" and agg_column:
-                    result = df.groupby(group_column)[agg_column].min().reset_index()
-                else:
-                    result = df.groupby(group_column)[agg_column].mean().reset_index()
+            if keys:
+                result = processor.group_by(keys, aggregates)
                 
                 # Replace NaN values with None before converting
                 result = result.where(pd.notnull(result), None)
                 
                 # Convert numpy types before returning
-                from services.data_processor import convert_numpy_types
                 return convert_numpy_types(result.to_dict('records'))
         
         return {"message": "Analysis completed"}
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Custom analysis failed: {str(e)}")
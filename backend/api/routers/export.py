@@ -1,26 +1,72 @@
 from fastapi import APIRouter, HTTPException, Path
-from fastapi.responses import StreamingResponse, Response
+from fastapi.responses import StreamingResponse, Response, FileResponse
 import io
 import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Union
 from api.routers.upload import sessions
+from services.data_processor import convert_numpy_types
+from services.filter_engine import request_filters
+from services.groupby_engine import groupby_request
+import numpy as np
 import pandas as pd
 
 router = APIRouter()
 
+def csv_chunks(frames: Iterable[pd.DataFrame]) -> Iterator[str]:
+    """Write row batches as one CSV, so a large export never has to be held whole"""
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header)
+        header = False
+
+def json_chunks(frames: Iterable[pd.DataFrame]) -> Iterator[str]:
+    """Write row batches as one JSON array of records"""
+    yield "["
+    separator = "\n"
+    for frame in frames:
+        for record in convert_numpy_types(frame.to_dict('records')):
+            yield separator + json.dumps(record)
+            separator = ",\n"
+    yield "\n]"
+
+def repeated_rows(processor, subset: Optional[Union[str, List[str]]],
+                  rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Mark rows, or the given ascending positions, repeating an earlier one over all columns or a subset"""
+    requested = [col.strip() for col in (subset.split(",") if isinstance(subset, str) else subset or [])
+                 if col.strip()]
+    names = {str(col): col for col in processor.df.columns}
+    missing = [col for col in requested if col not in names]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(missing)}")
+    # Reuses the duplicate groups already found by the analysis
+    return processor.duplicate_mask(tuple(names[col] for col in requested) or None, rows)
+
 @router.get("/{session_id}")
 async def export_data(
     session_id: str,
-    format: str = "csv"
+    format: str = "csv",
+    drop_duplicates: bool = False,
+    subset: Optional[str] = None
 ):
-    """Export processed data in various formats"""
+    """Export processed data in various formats, optionally without repeated rows (or repeated subset values)"""
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
     processor = sessions[session_id]["processor"]
     
+    if getattr(processor, "profile", None) is not None:
+        # Streamed CSVs are only held as a sample; hand back the uploaded file itself
+        if format.lower() != "csv" or drop_duplicates:
+            raise HTTPException(status_code=400,
+                                detail="Large CSV datasets can only be exported as the original CSV")
+        return FileResponse(processor.file_path, media_type="text/csv",
+                            filename=f"export_{session_id}.csv")
+    
+    df = processor.df
+    if drop_duplicates:
+        df = df[~repeated_rows(processor, subset)]
+    
     try:
-        df = processor.df
         
         if format.lower() == "csv":
             # Export as CSV
@@ -77,41 +123,25 @@ async def export_data(
 async def export_filtered_data(
     session_id: str,
     filter_config: dict,
-    format: str = "csv"
+    format: str = "csv",
+    drop_duplicates: bool = False,
+    subset: Optional[str] = None
 ):
-    """Export filtered data based on conditions"""
+    """Export filtered data based on conditions, optionally without repeated rows (or repeated subset values)"""
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
     processor = sessions[session_id]["processor"]
     
     try:
-        df = processor.df.copy()  # Work with a copy to avoid modifying original
-        
-        # Apply filters
-        for filter_item in filter_config.get("filters", []):
-            column = filter_item.get("column")
-            operator = filter_item.get("operator")
-            value = filter_item.get("value")
-            
-            if column and operator and value is not None:
-                if operator == "=":
-                    df = df[df[column] == value]
-                elif operator == ">":
-                    df = df[df[column] > value]
-                elif operator == "<":
-                    df = df[df[column] < value]
-                elif operator == "contains":
-                    df = df[df[column].astype(str).str.contains(str(value), na=False)]
+        positions = processor.filter_rows(filter_config.get("filters", []))
+        if drop_duplicates:
+            positions = positions[~repeated_rows(processor, subset, positions)]
         
         # Export filtered data
         if format.lower() == "csv":
-            csv_string = df.to_csv(index=False)
-            output = io.BytesIO(csv_string.encode())
-            output.seek(0)
-            
             return StreamingResponse(
-                output,
+                csv_chunks(processor.iter_rows(positions)),
                 media_type="text/csv",
                 headers={
                     "Content-Disposition": f"attachment; filename=filtered_{session_id}.csv"
@@ -120,6 +150,10 @@ async def export_filtered_data(
         
         # Add other formats as needed
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Filtered export failed: {str(e)}")
 
@@ -137,73 +171,36 @@ async def export_custom_data(
     format_type = request_body.get("format", "csv")
     
     try:
-        df = processor.df.copy()
+        # Every row is exported unless filtered, a batch at a time for streamed CSVs
+        frames = None
         
         if export_type == "filter":
             # Apply filters
-            filters = request_body.get("filters", [])
-            for filter_item in filters:
-                column = filter_item.get("column")
-                operator = filter_item.get("operator", "=")
-                value = filter_item.get("value")
-                
-                if column and value is not None:
-                    try:
-                        # Handle text operators
-                        if operator == "=":
-                            df = df[df[column].astype(str) == str(value)]
-                        elif operator == "!=":
-                            df = df[df[column].astype(str) != str(value)]
-                        elif operator == "contains":
-                            df = df[df[column].astype(str).str.contains(str(value), case=False, na=False)]
-                        elif operator == "starts with":
-                            df = df[df[column].astype(str).str.startswith(str(value), na=False)]
-                        elif operator == "ends with":
-                            df = df[df[column].astype(str).str.endswith(str(value), na=False)]
-                        # Numeric operators
-                        elif operator in [">", "<", ">=", "<="]:
-                            try:
-                                numeric_value = float(value)
-                                if operator == ">":
-                                    df = df[df[column] > numeric_value]
-                                elif operator == "<":
-                                    df = df[df[column] < numeric_value]
-                                elif operator == ">=":
-                                    df = df[df[column] >= numeric_value]
-                                elif operator == "<=":
-                                    df = df[df[column] <= numeric_value]
-                            except (ValueError, TypeError):
-                                continue
-                    except Exception as e:
-                        print(f"Error applying filter on column {column}: {str(e)}")
-                        continue
+            positions = processor.filter_rows(request_filters(request_body))
+            if request_body.get("drop_duplicates"):
+                positions = positions[~repeated_rows(processor, request_body.get("subset"), positions)]
+            frames = processor.iter_rows(positions)
         
         elif export_type == "groupby":
             # Handle group by export
-            group_column = request_body.get("group_column")
-            agg_column = request_body.get("agg_column")
-            agg_func = request_body.get("agg_func", "mean")
+            keys, aggregates = groupby_request(request_body)
             
-            if group_column:
-                if agg_func == "mean" and agg_column:
-                    df = df.groupby(group_column)[agg_column].mean().reset_index()
-                elif agg_func == "sum" and agg_column:
-                    df = df.groupby(group_column)[agg_column].sum().reset_index()
-                elif agg_func == "count":
-                    df = df.groupby(group_column).size().reset_index(name='count')
-                elif agg_func == "max" and agg_column:
-                    df = df.groupby(group_column)[agg_column].max().reset_index()
-                elif agg_func == "min" and agg_column:
-                    df = df.groupby(group_column)[agg_column].min().reset_index()
+            if keys:
+                df = processor.group_by(keys, aggregates)
                 
                 # Replace NaN values with None before exporting
-                df = df.where(pd.notnull(df), None)
+                frames = [df.where(pd.notnull(df), None)]
+        
+        if frames is None:
+            if request_body.get("drop_duplicates"):
+                frames = processor.iter_rows(np.flatnonzero(~repeated_rows(processor, request_body.get("subset"))))
+            else:
+                frames = processor.iter_rows()
         
         # Export in requested format
         if format_type.lower() == "csv":
-            csv_string = df.to_csv(index=False)
-            return Response(
-                content=csv_string,
+            return StreamingResponse(
+                csv_chunks(frames),
                 media_type="text/csv",
                 headers={
                     "Content-Disposition": f"attachment; filename={export_type}_{session_id}.csv"
@@ -211,11 +208,8 @@ async def export_custom_data(
             )
         
         elif format_type.lower() == "json":
-            from services.data_processor import convert_numpy_types
-            data = df.to_dict('records')
-            json_str = json.dumps(convert_numpy_types(data), indent=2)
-            return Response(
-                content=json_str,
+            return StreamingResponse(
+                json_chunks(frames),
                 media_type="application/json",
                 headers={
                     "Content-Disposition": f"attachment; filename={export_type}_{session_id}.json"
@@ -225,5 +219,9 @@ async def export_custom_data(
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported format: {format_type}")
             
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Custom export failed: {str(e)}")
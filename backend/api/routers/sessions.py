@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import List, Dict, Any
 from datetime import datetime
-from api.routers.upload import sessions
+from api.routers.upload import sessions, discard_session
 
 router = APIRouter()
 
@@ -11,8 +11,8 @@ async def list_sessions():
     session_list = []
     
     for session_id, session_data in sessions.items():
-        processor = session_data["processor"]
-        basic_info = processor.get_basic_info()
+        # Cached at upload time, so listing never has to reattach or parse data
+        basic_info = session_data["basic_info"]
         
         session_list.append({
             "session_id": session_id,
@@ -53,12 +53,14 @@ async def delete_session(session_id: str):
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    del sessions[session_id]
+    discard_session(session_id)
     return {"message": f"Session {session_id} deleted successfully"}
 
 @router.delete("/clear")
 async def clear_all_sessions():
     """Clear all sessions"""
-    count = len(sessions)
-    sessions.clear()
+    session_ids = list(sessions.keys())
+    for session_id in session_ids:
+        discard_session(session_id)
+    count = len(session_ids)
     return {"message": f"Cleared {count} sessions"}
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
-from api.routers.upload import get_session_processor
+from api.routers.upload import get_session_processor, sessions
 from services.data_processor import DataProcessor
 
 router = APIRouter()
@@ -21,7 +21,7 @@ async def get_sheet_info(processor: DataProcessor = Depends(get_session_processo
         
         # Add current active sheet info
         if processor.df is not None:
-            sheet_info["active_sheet"] = sheet_names[0] if sheet_names else None
+            sheet_info["active_sheet"] = processor.active_sheet if sheet_names else None
         
         return sheet_info
     except Exception as e:
@@ -29,6 +29,7 @@ async def get_sheet_info(processor: DataProcessor = Depends(get_session_processo
 
 @router.post("/{session_id}/switch/")
 async def switch_sheet(
+    session_id: str,
     sheet_name: str,
     processor: DataProcessor = Depends(get_session_processor)
 ):
@@ -37,6 +38,7 @@ async def switch_sheet(
         success = processor.switch_sheet(sheet_name)
         if not success:
             raise HTTPException(status_code=404, detail=f"Sheet '{sheet_name}' not found")
+        sessions.set_active_sheet(session_id, sheet_name)
         
         # Return basic info about the newly active sheet
         return {
@@ -92,14 +94,15 @@ async def get_common_columns(
         if sheet1 not in processor.sheets or sheet2 not in processor.sheets:
             raise HTTPException(status_code=404, detail="One or both sheets not found")
         
-        df1 = processor.sheets[sheet1]
-        df2 = processor.sheets[sheet2]
+        # Header metadata is enough here; the sheets stay unparsed until compared
+        sheet1_columns = processor.get_sheet_columns(sheet1)
+        sheet2_columns = processor.get_sheet_columns(sheet2)
         
-        common_columns = list(set(df1.columns) & set(df2.columns))
+        common_columns = list(set(sheet1_columns) & set(sheet2_columns))
         
         return {
-            "sheet1_columns": df1.columns.tolist(),
-            "sheet2_columns": df2.columns.tolist(),
+            "sheet1_columns": sheet1_columns,
+            "sheet2_columns": sheet2_columns,
             "common_columns": common_columns
         }
     except HTTPException:
@@ -7,6 +7,7 @@ import numpy as np
 import os
 import io
 from datetime import datetime
+from api.routers.upload import sessions
 
 router = APIRouter()
 
@@ -34,15 +35,15 @@ class StockMovementResult(BaseModel):
     summary: Optional[Dict] = None
     columns: Optional[List[str]] = None
 
-def get_session_file(session_id: str) -> str:
-    """Get the file path for a session"""
-    # Check uploads directory
-    uploads_dir = "uploads"
-    for file in os.listdir(uploads_dir):
-        if file.startswith(session_id):
-            return os.path.join(uploads_dir, file)
+def get_session_data_processor(session_id: str):
+    """Get the processor of a session that holds tabular data"""
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
     
-    raise HTTPException(status_code=404, detail="Session file not found")
+    processor = sessions[session_id]["processor"]
+    if not hasattr(processor, "read_table"):
+        raise HTTPException(status_code=400, detail="Stock movement analysis requires a CSV or Excel file")
+    return processor
 
 
 def validate_stock_movement_file(df: pd.DataFrame) -> Dict[str, Any]:
@@ -102,14 +103,8 @@ async def process_stock_movement(config: StockMovementConfig):
     Process stock movement data with UOM conversion and running balance
     """
     try:
-        # Get the file path
-        file_path = get_session_file(config.session_id)
-        
-        # Read the data
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
+        # Read a private copy of the parsed data from the columnar cache
+        df = get_session_data_processor(config.session_id).read_table()
         
         # Validate if this is a stock movement file
         validation_result = validate_stock_movement_file(df)
@@ -210,13 +205,8 @@ async def validate_stock_movement_file_endpoint(session_id: str):
     Validate if the uploaded file is a valid stock movement report
     """
     try:
-        file_path = get_session_file(session_id)
-        
-        # Read the data
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
+        # Read the parsed data from the columnar cache
+        df = get_session_data_processor(session_id).read_table()
         
         validation_result = validate_stock_movement_file(df)
         
@@ -242,6 +232,8 @@ async def validate_stock_movement_file_endpoint(session_id: str):
                 result["format2_missing_columns"] = validation_result['format2_missing']
         
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -251,19 +243,16 @@ async def get_available_columns(session_id: str):
     Get available columns from the uploaded file
     """
     try:
-        file_path = get_session_file(session_id)
-        
-        # Read just the headers
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path, nrows=1)
-        else:
-            df = pd.read_excel(file_path, nrows=1)
+        # Read just the schema
+        column_types = get_session_data_processor(session_id).get_table_schema()
         
         return {
             "success": True,
-            "columns": list(df.columns),
-            "column_types": {col: str(df[col].dtype) for col in df.columns}
+            "columns": list(column_types.keys()),
+            "column_types": column_types
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
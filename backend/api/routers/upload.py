@@ -1,17 +1,56 @@
 from fastapi import APIRouter, File, UploadFile, HTTPException, Request, Depends
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Dict
 from services.data_processor import DataProcessor
 from services.pdf_processor import PDFProcessor
+from services.ingest import stream_to_disk
+from services.jobs import ingest_jobs
+from services.columnar_cache import columnar_cache
+from services.result_cache import result_cache
+from services.dataset_store import dataset_store
+from services.session_manager import SessionManager
+from services.session_registry import session_registry
 import uuid
 import os
 from datetime import datetime
-import shutil
 
 router = APIRouter()
 
-# In-memory session storage (in production, use Redis or a database)
-sessions: Dict[str, dict] = {}
+def build_processor(file_type: str, file_path: str, file_hash: str):
+    """Parse a stored upload with the processor for its type"""
+    if file_type == "pdf":
+        return PDFProcessor(file_path, file_hash=file_hash)
+    return DataProcessor(file_path, file_hash=file_hash)
+
+def load_session_processor(session: dict):
+    """Attach the parsed data of a session restored from the registry or created by another worker"""
+    processor, _, _ = dataset_store.acquire(
+        session["file_hash"],
+        session["file_path"],
+        lambda: build_processor(session["file_type"], session["file_path"], session["file_hash"])
+    )
+    if session.get("active_sheet") and hasattr(processor, "switch_sheet"):
+        processor.switch_sheet(session["active_sheet"])
+    return processor
+
+def release_session_data(session: dict):
+    """Drop a session's hold on its parsed dataset in this worker"""
+    if session["processor"] is None:
+        # Never attached in this worker
+        return
+    entry = dataset_store.release(session["file_hash"])
+    if entry is not None and hasattr(entry["processor"], "close"):
+        entry["processor"].close()
+
+# Session storage with a RAM budget; idle datasets spill to the columnar cache and
+# metadata lives in SQLite so sessions survive restarts and are shared by all workers
+sessions = SessionManager(registry=session_registry, loader=load_session_processor,
+                          releaser=release_session_data)
+
+def restore_sessions():
+    """Reload the sessions of previous runs without parsing their files"""
+    return len(sessions.restore())
 
 def get_session_processor(request: Request, session_id: str = None):
     """Dependency to get session processor"""
@@ -19,9 +58,68 @@ def get_session_processor(request: Request, session_id: str = None):
         return sessions[session_id]["processor"]
     return None
 
+def remove_session_files(session: dict):
+    """Release a session's dataset, deleting the upload once no session on any worker shares it"""
+    release_session_data(session)
+    if sessions.dataset_in_use(session["file_hash"]):
+        # Another session still uses the same bytes
+        return
+    if os.path.exists(session["file_path"]):
+        os.remove(session["file_path"])
+    columnar_cache.remove(session["file_hash"])
+    result_cache.invalidate(session["file_hash"])
+
+def discard_session(session_id: str):
+    """Remove a session and release its dataset"""
+    remove_session_files(sessions.pop(session_id))
+
+def process_upload(job_id: str, session_id: str, filename: str, file_path: str,
+                   file_ext: str, ingest: dict) -> dict:
+    """Parse an uploaded file on an ingest worker and register its session"""
+    file_hash = ingest["file_hash"]
+    file_type = "pdf" if file_ext == '.pdf' else "data"
+    
+    try:
+        ingest_jobs.update(job_id, progress=10, message="Parsing file")
+        # Identical bytes uploaded earlier, possibly through another worker, share one stored copy
+        stored_path = sessions.dataset_file(file_hash)
+        source_path = stored_path if stored_path and os.path.exists(stored_path) else file_path
+        processor, dataset, _ = dataset_store.acquire(
+            file_hash, source_path, lambda: build_processor(file_type, source_path, file_hash)
+        )
+    except Exception:
+        # Clean up on error
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+    
+    deduplicated = dataset["file_path"] != file_path
+    if deduplicated:
+        # The stored copy already holds these bytes
+        os.remove(file_path)
+    
+    basic_info = dict(dataset["basic_info"])
+    basic_info["file_size_mb"] = round(ingest["size_bytes"] / 1024 / 1024, 2)
+    
+    # Store session; the least recently used beyond the session limit are dropped
+    evicted = sessions.add(session_id, {
+        "processor": processor,
+        "filename": filename,
+        "file_path": dataset["file_path"],
+        "file_hash": file_hash,
+        "timestamp": datetime.now(),
+        "basic_info": basic_info,
+        "file_type": file_type,
+        "active_sheet": getattr(processor, "active_sheet", None)
+    })
+    for old_session in evicted:
+        remove_session_files(old_session)
+    
+    return {"basic_info": basic_info, "deduplicated": deduplicated}
+
 @router.post("/")
 async def upload_file(file: UploadFile = File(...)):
-    """Upload a CSV, Excel, or PDF file for analysis"""
+    """Upload a CSV, Excel, or PDF file and queue it for processing"""
     
     # Validate file extension
     allowed_extensions = {'.csv', '.xlsx', '.xls', '.pdf'}
@@ -43,53 +141,59 @@ async def upload_file(file: UploadFile = File(...)):
     file_path = os.path.join(upload_dir, f"{session_id}_{file.filename}")
     
     try:
-        # Save file to disk
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Process the file based on type
-        if file_ext == '.pdf':
-            processor = PDFProcessor(file_path)
-            basic_info = processor.get_basic_info()
-            file_type = "pdf"
-        else:
-            processor = DataProcessor(file_path)
-            basic_info = processor.get_basic_info()
-            file_type = "data"
-        
-        # Store session
-        sessions[session_id] = {
-            "processor": processor,
-            "filename": file.filename,
-            "file_path": file_path,
-            "timestamp": datetime.now(),
-            "basic_info": basic_info,
-            "file_type": file_type
-        }
-        
-        # Clean up old sessions (keep only last 10)
-        if len(sessions) > 10:
-            oldest_session = min(sessions.keys(), key=lambda k: sessions[k]["timestamp"])
-            old_file = sessions[oldest_session]["file_path"]
-            if os.path.exists(old_file):
-                os.remove(old_file)
-            del sessions[oldest_session]
-        
-        return JSONResponse(
-            status_code=200,
-            content={
-                "session_id": session_id,
-                "filename": file.filename,
-                "message": "File uploaded and processed successfully",
-                "basic_info": basic_info
-            }
-        )
+        # Save file to disk, hashing and sniffing it in the same pass
+        ingest = await run_in_threadpool(stream_to_disk, file.file, file_path, file_ext)
         
+        if not ingest["extension_matches"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File content does not match its {file_ext} extension."
+            )
     except Exception as e:
         # Clean up on error
         if os.path.exists(file_path):
             os.remove(file_path)
-        raise HTTPException(status_code=500, detail=f"Failed to process file: {str(e)}")
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    
+    # Parsing happens on the ingest pool so the event loop stays responsive
+    job_id = ingest_jobs.submit(
+        process_upload, session_id, file.filename, file_path, file_ext, ingest,
+        session_id=session_id, filename=file.filename
+    )
+    
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job_id,
+            "session_id": session_id,
+            "filename": file.filename,
+            "state": "queued",
+            "message": "File uploaded and queued for processing"
+        }
+    )
+
+@router.get("/jobs/{job_id}")
+async def get_upload_job(job_id: str):
+    """Get the processing state of an upload job"""
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    result = job["result"] or {}
+    return {
+        "job_id": job_id,
+        "session_id": job["session_id"],
+        "filename": job["filename"],
+        "state": job["state"],
+        "progress": job["progress"],
+        "message": job["message"],
+        "error": job["error"],
+        "basic_info": result.get("basic_info"),
+        "created_at": job["created_at"].isoformat(),
+        "finished_at": job["finished_at"].isoformat() if job["finished_at"] else None
+    }
 
 @router.get("/session/{session_id}")
 async def get_session_info(session_id: str):
@@ -111,13 +215,8 @@ async def delete_session(session_id: str):
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Remove file
-    file_path = sessions[session_id]["file_path"]
-    if os.path.exists(file_path):
-        os.remove(file_path)
-    
-    # Remove session
-    del sessions[session_id]
+    # Remove session and release its file
+    discard_session(session_id)
     
     return {"message": "Session deleted successfully"}
 
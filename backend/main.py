@@ -42,6 +42,8 @@ app.include_router(stock_movement.router, prefix="/api/stock-movement", tags=["s
 @app.on_event("startup")
 async def startup_event():
     print("🚀 Data Insights Platform starting...")
+    restored = upload.restore_sessions()
+    print(f"Restored {restored} sessions")
 
 @app.get("/")
 async def root():
@@ -0,0 +1,170 @@
+import os
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from services.columnar_cache import columnar_cache, DEFAULT_TABLE
+from services.sketches import FrameProfile
+from services.stats_engine import profile_column_stats
+
+# CSV uploads above this size are streamed in row batches instead of being read whole
+CHUNKED_CSV_MB = float(os.environ.get("DATA_INSIGHT_CHUNKED_CSV_MB", "512"))
+
+# Uniform random rows kept in memory to stand in for a streamed table
+SAMPLE_ROWS = int(os.environ.get("DATA_INSIGHT_SAMPLE_ROWS", "100000"))
+
+CSV_CHUNK_ROWS = 200000
+
+# Cache key of the in-memory sample of a streamed table
+SAMPLE_TABLE = "__sample__"
+
+# Histogram resolution precomputed for numeric columns, matching get_value_distribution's default
+PROFILE_BINS = 20
+
+TOP_VALUES = 50
+
+def should_stream_csv(file_path: str) -> bool:
+    """Check whether a CSV is large enough to be ingested in row batches"""
+    return os.path.getsize(file_path) > CHUNKED_CSV_MB * 1024 * 1024
+
+def _to_arrow(chunk: pd.DataFrame) -> pa.Table:
+    try:
+        return pa.Table.from_pandas(chunk, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Object columns mixing numbers and text are stored as text
+        text_cols = {col: "string" for col, dtype in zip(chunk.columns, chunk.dtypes) if dtype == object}
+        return pa.Table.from_pandas(chunk.astype(text_cols), preserve_index=False)
+
+def _unify_type(types: List[pa.DataType]) -> pa.DataType:
+    distinct = {t for t in types if not pa.types.is_null(t)}
+    if not distinct:
+        return pa.string()
+    if len(distinct) == 1:
+        return distinct.pop()
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in distinct):
+        return pa.float64()
+    return pa.string()
+
+def _unify_schemas(schemas: List[pa.Schema]) -> pa.Schema:
+    """Widen per-chunk inferred types to one schema: mixed numbers become floats, anything else text"""
+    names = schemas[0].names
+    return pa.schema([(name, _unify_type([schema.field(name).type for schema in schemas]))
+                      for name in names])
+
+def _bottom_k(sample: Optional[Tuple[pd.DataFrame, np.ndarray]], chunk: pd.DataFrame,
+              rng: np.random.Generator, k: int) -> Tuple[pd.DataFrame, np.ndarray]:
+    # Keeping the k rows with the smallest random keys is a uniform sample without replacement
+    keys = rng.random(len(chunk))
+    if sample is not None:
+        chunk = pd.concat([sample[0], chunk])
+        keys = np.concatenate([sample[1], keys])
+    if len(chunk) > k:
+        keep = np.argpartition(keys, k)[:k]
+        chunk, keys = chunk.iloc[keep], keys[keep]
+    return chunk, keys
+
+def ingest_csv(file_path: str, file_hash: str, chunk_rows: int = CSV_CHUNK_ROWS,
+               sample_rows: int = SAMPLE_ROWS) -> Optional[Dict[str, Any]]:
+    """Stream a CSV into the columnar cache, profiling it on the way.
+
+    Memory stays flat: only one chunk and the bounded sample are held at a time. Returns
+    the manifest describing the profile, or None if the file has no rows.
+    """
+    parts: List[Tuple[str, pa.Schema]] = []
+    try:
+        # Pass 1: parse chunks; inferred types may differ between them, so each is stored apart
+        for i, chunk in enumerate(pd.read_csv(file_path, chunksize=chunk_rows)):
+            if chunk.empty:
+                continue
+            table = _to_arrow(chunk)
+            name = f"__part_{i}__"
+            with columnar_cache.writer(file_hash, name, table.schema) as writer:
+                writer.write_table(table)
+            parts.append((name, table.schema))
+        if not parts:
+            return None
+        schema = _unify_schemas([part_schema for _, part_schema in parts])
+
+        # Pass 2: cast every chunk to the common schema, then write, profile and sample it
+        profile: Optional[FrameProfile] = None
+        sample = None
+        rng = np.random.default_rng()
+        offset = 0
+        with columnar_cache.writer(file_hash, DEFAULT_TABLE, schema) as writer:
+            for name, _ in parts:
+                for table in columnar_cache.iter_batches(file_hash, name):
+                    table = table.cast(schema)
+                    writer.write_table(table)
+                    chunk = table.to_pandas()
+                    chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                    offset += len(chunk)
+                    if profile is None:
+                        profile = FrameProfile.empty(dict(zip(chunk.columns, chunk.dtypes)))
+                    profile.update(chunk)
+                    sample = _bottom_k(sample, chunk, rng, sample_rows)
+                columnar_cache.remove_table(file_hash, name)
+    finally:
+        for name, _ in parts:
+            columnar_cache.remove_table(file_hash, name)
+
+    # The sample keeps file order so previews still show the earliest rows first
+    sample_df = sample[0].sort_index().reset_index(drop=True)
+    columnar_cache.write(file_hash, SAMPLE_TABLE, sample_df)
+
+    histograms, outliers = _scan_numeric(file_hash, profile)
+    top_values = {
+        col: {"values": [[str(value), count] for value, count in column.frequent.top(TOP_VALUES)],
+              "max_count_error": column.frequent.error}
+        for col, column in profile.columns.items() if column.frequent is not None
+    }
+    return {
+        "out_of_core": True,
+        "profile": {
+            "rows": profile.rows,
+            "sample_rows": len(sample_df),
+            "column_stats": profile_column_stats(profile),
+            "histograms": histograms,
+            "outliers": outliers,
+            "top_values": top_values
+        }
+    }
+
+def _scan_numeric(file_hash: str, profile: FrameProfile) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Pass 3: histograms and IQR outlier counts, which need the extremes and quartiles found so far"""
+    numeric = {col: column for col, column in profile.columns.items()
+               if column.kind == "numeric" and column.count > 0}
+    if not numeric:
+        return {}, {}
+
+    edges, bounds = {}, {}
+    for col, column in numeric.items():
+        if column.min != column.max:
+            edges[col] = np.linspace(column.min, column.max, PROFILE_BINS + 1)
+        q1, q3 = column.quantiles.quantiles([0.25, 0.75])
+        iqr = q3 - q1
+        bounds[col] = (q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+    counts = {col: np.zeros(PROFILE_BINS, dtype=np.int64) for col in edges}
+    outlier_counts = dict.fromkeys(numeric, 0)
+
+    for table in columnar_cache.iter_batches(file_hash, DEFAULT_TABLE, list(numeric)):
+        for col in numeric:
+            values = table.column(col).to_numpy(zero_copy_only=False).astype(np.float64)
+            values = values[~np.isnan(values)]
+            if col in edges:
+                counts[col] += np.histogram(values, bins=edges[col])[0]
+            lower, upper = bounds[col]
+            outlier_counts[col] += int(np.count_nonzero((values < lower) | (values > upper)))
+
+    histograms = {col: {"edges": edges[col].tolist(), "counts": counts[col].tolist()} for col in edges}
+    outliers = {
+        col: {
+            "count": outlier_counts[col],
+            "percentage": outlier_counts[col] / numeric[col].count * 100,
+            "lower_bound": float(bounds[col][0]),
+            "upper_bound": float(bounds[col][1])
+        }
+        for col in numeric if outlier_counts[col] > 0
+    }
+    return histograms, outliers
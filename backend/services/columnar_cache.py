@@ -0,0 +1,140 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+# Parsed tables live next to the uploads they came from
+CACHE_DIR = os.path.join("uploads", ".cache")
+
+# Cache key for files without named sheets (CSV)
+DEFAULT_TABLE = "__default__"
+
+MANIFEST_FILE = "manifest.json"
+
+def _temp_path(path: str) -> str:
+    # Unique per process and thread, as ingest and analysis workers may write the same table at once
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+class ColumnarCache:
+    """Arrow IPC copies of parsed tables, keyed by file hash and sheet name"""
+
+    def __init__(self, root: str = CACHE_DIR):
+        self.root = root
+
+    def _dataset_dir(self, file_hash: str) -> str:
+        return os.path.join(self.root, file_hash)
+
+    def _table_path(self, file_hash: str, sheet_name: str) -> str:
+        # Sheet names may contain characters that are not valid in file names
+        table_key = hashlib.md5(sheet_name.encode("utf-8")).hexdigest()
+        return os.path.join(self._dataset_dir(file_hash), f"{table_key}.arrow")
+
+    def has(self, file_hash: str, sheet_name: str = DEFAULT_TABLE) -> bool:
+        """Check whether a table is cached"""
+        return os.path.exists(self._table_path(file_hash, sheet_name))
+
+    def write(self, file_hash: str, sheet_name: str, df: pd.DataFrame) -> bool:
+        """Persist a parsed table; returns False if it cannot be stored losslessly"""
+        if not all(isinstance(col, str) for col in df.columns):
+            # Arrow would silently stringify non-text column names
+            return False
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            print(f"Skipping columnar cache for sheet {sheet_name}: {str(e)}")
+            return False
+
+        path = self._table_path(file_hash, sheet_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see a partial table
+        tmp_path = _temp_path(path)
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        return True
+
+    @contextmanager
+    def writer(self, file_hash: str, sheet_name: str,
+               schema: pa.Schema) -> Iterator[pa.ipc.RecordBatchFileWriter]:
+        """Write a table batch by batch; it only becomes visible once the block exits cleanly"""
+        path = self._table_path(file_hash, sheet_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = _temp_path(path)
+        try:
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, schema) as writer:
+                    yield writer
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def iter_batches(self, file_hash: str, sheet_name: str = DEFAULT_TABLE,
+                     columns: Optional[List[str]] = None) -> Iterator[pa.Table]:
+        """Memory-map a cached table and yield it one record batch at a time"""
+        source = pa.memory_map(self._table_path(file_hash, sheet_name), "r")
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            table = pa.Table.from_batches([reader.get_batch(i)])
+            yield table.select(columns) if columns is not None else table
+
+    def remove_table(self, file_hash: str, sheet_name: str):
+        """Drop a single cached table"""
+        path = self._table_path(file_hash, sheet_name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def read_table(self, file_hash: str, sheet_name: str = DEFAULT_TABLE,
+                   columns: Optional[List[str]] = None) -> pa.Table:
+        """Memory-map a cached table"""
+        source = pa.memory_map(self._table_path(file_hash, sheet_name), "r")
+        table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        return table
+
+    def read(self, file_hash: str, sheet_name: str = DEFAULT_TABLE,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load a cached table as a DataFrame.
+
+        Columns Arrow can hand over without conversion (numeric, no nulls) stay backed by
+        the memory map, so every worker reading the same table shares its pages.
+        """
+        return self.read_table(file_hash, sheet_name, columns).to_pandas(split_blocks=True)
+
+    def read_schema(self, file_hash: str, sheet_name: str = DEFAULT_TABLE) -> Dict[str, str]:
+        """Get column names and pandas dtypes of a cached table without reading its data"""
+        source = pa.memory_map(self._table_path(file_hash, sheet_name), "r")
+        schema = pa.ipc.open_file(source).schema
+        empty = schema.empty_table().to_pandas()
+        return {col: str(dtype) for col, dtype in zip(empty.columns, empty.dtypes)}
+
+    def write_manifest(self, file_hash: str, manifest: Dict[str, Any]):
+        """Store dataset level metadata such as sheet order and headers"""
+        path = os.path.join(self._dataset_dir(file_hash), MANIFEST_FILE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = _temp_path(path)
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, default=str)
+        os.replace(tmp_path, path)
+
+    def read_manifest(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Load dataset level metadata, if present"""
+        path = os.path.join(self._dataset_dir(file_hash), MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def remove(self, file_hash: str):
+        """Drop every cached table of a dataset"""
+        shutil.rmtree(self._dataset_dir(file_hash), ignore_errors=True)
+
+columnar_cache = ColumnarCache()
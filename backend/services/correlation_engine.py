@@ -0,0 +1,100 @@
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.parallel import column_executor
+
+CORRELATION_METHODS = ("pearson", "spearman")
+# Encodings get_correlations can return
+CORRELATION_MODES = ("matrix", "compact", "pairs")
+
+# Values per row block; bounds the float copy of a wide table to about 32 MB
+CORRELATION_BLOCK_VALUES = 4 * 1024 * 1024
+
+def _column_values(df: pd.DataFrame, col: str, method: str) -> np.ndarray:
+    series = df[col]
+    if method == "spearman":
+        # Average ranks over the column's own non-null values
+        series = series.rank(method="average")
+    return series.to_numpy(dtype="float64", na_value=np.nan)
+
+def correlation_matrix(df: pd.DataFrame, columns: List[str], method: str = "pearson") -> np.ndarray:
+    """Pairwise-complete correlation matrix from a few matrix products per block of rows.
+
+    Matches DataFrame.corr: each pair only uses rows where both values are present, and
+    pairs with fewer than two such rows or no variance are NaN. For spearman, ranks are
+    taken per column, so with missing values they can differ slightly from pandas, which
+    re-ranks every pair on its shared rows.
+    """
+    if method not in CORRELATION_METHODS:
+        raise ValueError(f"Unsupported correlation method: {method}")
+    count = len(columns)
+    if count == 0:
+        return np.empty((0, 0))
+
+    values = column_executor.map(lambda col: _column_values(df, col, method), columns)
+    # Centering first keeps the sums of products small, avoiding cancellation
+    with np.errstate(invalid="ignore"):
+        means = np.array([np.nanmean(column) if column.size else np.nan for column in values])
+    means = np.nan_to_num(means)
+    has_missing = any(np.isnan(column).any() for column in values)
+
+    rows = len(df)
+    block_rows = max(1024, CORRELATION_BLOCK_VALUES // count)
+    products = np.zeros((count, count))
+    if has_missing:
+        pairs = np.zeros((count, count))
+        sums = np.zeros((count, count))
+        squares = np.zeros((count, count))
+
+    for start in range(0, rows, block_rows):
+        block = np.column_stack([column[start:start + block_rows] for column in values]) - means
+        if not has_missing:
+            products += block.T @ block
+            continue
+        present = ~np.isnan(block)
+        weights = present.astype("float64")
+        block[~present] = 0.0
+        products += block.T @ block
+        # sums[i, j] adds up column i over the rows where column j is present
+        pairs += weights.T @ weights
+        sums += block.T @ weights
+        squares += (block * block).T @ weights
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if not has_missing:
+            variances = np.diag(products)
+            result = products / np.sqrt(np.outer(variances, variances))
+            valid = np.full((count, count), rows >= 2)
+        else:
+            covariance = products - sums * sums.T / pairs
+            variance_i = squares - sums * sums / pairs
+            variance_j = variance_i.T
+            result = covariance / np.sqrt(variance_i * variance_j)
+            valid = pairs >= 2
+    result[~valid | ~np.isfinite(result)] = np.nan
+    # Rounding can push perfect correlations just past one
+    np.clip(result, -1.0, 1.0, out=result)
+    present_diagonal = ~np.isnan(np.diag(result))
+    result[np.diag_indices(count)] = np.where(present_diagonal, 1.0, np.nan)
+    return result
+
+def strongest_pairs(columns: List[str], matrix: np.ndarray, top_k: Optional[int] = None,
+                    threshold: float = 0.0) -> List[Dict[str, Any]]:
+    """Distinct column pairs with |r| at or above threshold, strongest first"""
+    upper_i, upper_j = np.triu_indices(len(columns), k=1)
+    correlations = matrix[upper_i, upper_j]
+    strength = np.abs(correlations)
+    keep = np.flatnonzero(~np.isnan(strength) & (strength >= threshold))
+    if top_k is not None and len(keep) > top_k:
+        keep = keep[np.argpartition(-strength[keep], top_k - 1)[:top_k]]
+    keep = keep[np.argsort(-strength[keep], kind="stable")]
+    return [
+        {
+            "column1": columns[upper_i[k]],
+            "column2": columns[upper_j[k]],
+            "correlation": float(correlations[k])
+        }
+        for k in keep
+    ]
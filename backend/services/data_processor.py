@@ -1,15 +1,37 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Callable, Iterator, Tuple
+from collections.abc import Mapping
 from pathlib import Path
 import json
 from datetime import datetime
 import hashlib
+import threading
+import copy
+from services.columnar_cache import columnar_cache, DEFAULT_TABLE
+from services.result_cache import cached_result
+from services.stats_engine import compute_column_stats, profile_column_stats
+from services.sketches import FrameProfile, profile_frame
+from services.chunked_ingest import ingest_csv, should_stream_csv, SAMPLE_TABLE, PROFILE_BINS
+from services.parallel import column_executor
+from services.correlation_engine import correlation_matrix, strongest_pairs, CORRELATION_MODES
+from services.outlier_engine import detect_outliers, outlier_positions
+from services.duplicate_engine import row_hashes, duplicate_groups
+from services.distribution_engine import histogram_counts, expand_distribution, compact_distribution
+from services.datetime_engine import (infer_datetimes, time_index, choose_granularity, bucket_bounds,
+                                      bucket_aggregates, TIME_GRANULARITIES)
+from services.filter_engine import filter_positions, compile_filters
+from services.groupby_engine import group_index, group_table, group_rows
+from services.index_engine import (ColumnIndexes, equality_index, sorted_index, trigram_index, INDEX_KINDS,
+                                   TRIGRAM_MIN_VALUES)
+
 
 def convert_numpy_types(obj):
     """Convert numpy types to Python native types for JSON serialization"""
     if isinstance(obj, np.integer):
         return int(obj)
+    elif isinstance(obj, np.bool_):
+        return bool(obj)
     elif isinstance(obj, np.floating):
         # Handle NaN and Inf values
         if np.isnan(obj) or np.isinf(obj):
@@ -29,12 +51,91 @@ def convert_numpy_types(obj):
     else:
         return obj
 
+class LazySheets(Mapping):
+    """Sheet name to DataFrame mapping that parses each sheet on first access"""
+    
+    def __init__(self, sheet_names: List[str], loader: Callable[[str], pd.DataFrame],
+                 on_all_loaded: Optional[Callable[[], None]] = None):
+        self._names = list(sheet_names)
+        self._loader = loader
+        self._on_all_loaded = on_all_loaded
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._sizes: Dict[str, int] = {}  # Deep memory usage of each loaded frame
+        self._lock = threading.Lock()
+    
+    def __getitem__(self, sheet_name: str) -> pd.DataFrame:
+        if sheet_name not in self._frames:
+            if sheet_name not in self._names:
+                raise KeyError(sheet_name)
+            with self._lock:
+                if sheet_name not in self._frames:
+                    df = self._loader(sheet_name)
+                    self._sizes[sheet_name] = int(df.memory_usage(deep=True).sum())
+                    self._frames[sheet_name] = df
+                    if self._on_all_loaded is not None and self.all_loaded():
+                        self._on_all_loaded()
+        return self._frames[sheet_name]
+    
+    def __contains__(self, sheet_name: object) -> bool:
+        # Membership must not trigger a parse
+        return sheet_name in self._names
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    def is_loaded(self, sheet_name: str) -> bool:
+        """Check whether a sheet has already been parsed"""
+        return sheet_name in self._frames
+    
+    def all_loaded(self) -> bool:
+        """Check whether every sheet has been parsed"""
+        return len(self._frames) == len(self._names)
+    
+    def memory_usage(self) -> int:
+        """Get the deep memory usage in bytes of the loaded frames"""
+        return sum(self._sizes.values())
+    
+    def unload_all(self, can_unload: Optional[Callable[[str, pd.DataFrame], bool]] = None) -> int:
+        """Drop loaded frames so they are reloaded on next access; returns bytes freed"""
+        freed = 0
+        with self._lock:
+            for sheet_name in list(self._frames):
+                if can_unload is None or can_unload(sheet_name, self._frames[sheet_name]):
+                    del self._frames[sheet_name]
+                    freed += self._sizes.pop(sheet_name, 0)
+        return freed
+
+def _header_names(header_row) -> List[str]:
+    """Mirror the column names pandas assigns to a raw header row"""
+    names = []
+    seen: Dict[str, int] = {}
+    for i, value in enumerate(header_row):
+        name = f"Unnamed: {i}" if value is None or value == "" else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
 class DataProcessor:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, file_hash: Optional[str] = None):
         self.file_path = Path(file_path)
-        self.df: Optional[pd.DataFrame] = None
-        self.sheets: Dict[str, pd.DataFrame] = {}  # For Excel files with multiple sheets
-        self.file_hash = self._generate_file_hash()
+        self.sheets: Mapping = {}  # For Excel files with multiple sheets, parsed lazily
+        self._tables: Mapping = {}  # Every table in the file, parsed lazily and spillable
+        self.sheet_metadata: Dict[str, Dict[str, Any]] = {}  # Cheap per-sheet dimensions and headers
+        self.active_sheet: Optional[str] = None
+        self.table_names: List[str] = []  # Columnar cache keys, in file order
+        self._excel_file: Optional[pd.ExcelFile] = None
+        # Precomputed statistics of a CSV too large to hold; df is then a uniform sample of it
+        self.profile: Optional[Dict[str, Any]] = None
+        self._indexes = ColumnIndexes()  # Secondary column indexes, built as filters need them
+        # Uploads are hashed while streamed to disk; only hash here when not supplied
+        self.file_hash = file_hash or self._generate_file_hash()
         self._load_data()
     
     def _generate_file_hash(self) -> str:
@@ -53,30 +154,205 @@ class DataProcessor:
         
         try:
             if file_ext == '.csv':
-                # Try to infer the separator
-                self.df = pd.read_csv(self.file_path)
+                self.table_names = [DEFAULT_TABLE]
+                manifest = columnar_cache.read_manifest(self.file_hash)
+                if manifest is None and should_stream_csv(str(self.file_path)):
+                    # Too large to read at once - stream it into the columnar cache instead
+                    manifest = ingest_csv(str(self.file_path), self.file_hash)
+                    if manifest is not None:
+                        columnar_cache.write_manifest(self.file_hash, manifest)
+                if manifest is not None:
+                    self.profile = manifest.get("profile")
             elif file_ext in ['.xlsx', '.xls']:
-                # Load all sheets from Excel file
-                excel_file = pd.ExcelFile(self.file_path)
-                sheet_names = excel_file.sheet_names
-                
-                if len(sheet_names) == 0:
-                    # Empty Excel file - create empty dataframe
-                    self.df = pd.DataFrame()
-                elif len(sheet_names) == 1:
-                    # Single sheet - load as main dataframe
-                    self.df = pd.read_excel(self.file_path)
+                manifest = columnar_cache.read_manifest(self.file_hash)
+                if manifest is not None:
+                    # Parsed before - sheet list and headers come from the cache manifest
+                    sheet_names = manifest["sheets"]
+                    self.sheet_metadata = manifest.get("sheet_metadata", {})
                 else:
-                    # Multiple sheets - load all into sheets dict
-                    for sheet_name in sheet_names:
-                        self.sheets[sheet_name] = pd.read_excel(self.file_path, sheet_name=sheet_name)
-                    # Use first sheet as default dataframe
-                    self.df = self.sheets[sheet_names[0]]
+                    # Open the workbook once; sheets are parsed from it on demand
+                    self._excel_file = pd.ExcelFile(self.file_path)
+                    sheet_names = self._excel_file.sheet_names
+                    if len(sheet_names) > 1:
+                        self.sheet_metadata = self._read_sheet_metadata(sheet_names)
+                    columnar_cache.write_manifest(self.file_hash, {
+                        "sheets": sheet_names,
+                        "sheet_metadata": self.sheet_metadata
+                    })
+                self.table_names = list(sheet_names)
+                # Use first sheet as default dataframe
+                self.active_sheet = sheet_names[0] if sheet_names else None
             else:
                 raise ValueError(f"Unsupported file format: {file_ext}")
+            
+            # Frames are materialized on first access; release the workbook once all are loaded
+            self._tables = LazySheets(self.table_names, self._load_table, on_all_loaded=self.close)
+            if len(self.table_names) > 1:
+                # Multiple sheets - cheap metadata was read up front
+                self.sheets = self._tables
+            elif not self.table_names:
+                # Empty Excel file - nothing to keep open
+                self.close()
+            
+            if self.table_names:
+                # Parse the active table now so load errors surface at upload time
+                self._tables[self._resolve_table(self.active_sheet)]
         except Exception as e:
             raise Exception(f"Error loading file: {str(e)}")
     
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        """The active table, reloaded transparently if it was spilled"""
+        table_name = self._resolve_table(self.active_sheet)
+        if table_name is None:
+            # Empty Excel file - empty dataframe
+            return pd.DataFrame()
+        return self._tables[table_name]
+    
+    def _load_table(self, table_name: str) -> pd.DataFrame:
+        """Load a table from the columnar cache, parsing and caching it on a miss"""
+        if self.profile is not None:
+            # Only the sample of a streamed table is held in memory
+            return columnar_cache.read(self.file_hash, SAMPLE_TABLE)
+        
+        if columnar_cache.has(self.file_hash, table_name):
+            try:
+                return columnar_cache.read(self.file_hash, table_name)
+            except Exception as e:
+                print(f"Columnar cache read failed for {table_name}: {str(e)}")
+        
+        if table_name == DEFAULT_TABLE:
+            df = pd.read_csv(self.file_path)
+        else:
+            df = self._parse_sheet(table_name)
+        if columnar_cache.write(self.file_hash, table_name, df):
+            # Serve the mapped copy so other workers share its pages instead of each parsing privately
+            return columnar_cache.read(self.file_hash, table_name)
+        return df
+    
+    def _parse_sheet(self, sheet_name: str) -> pd.DataFrame:
+        """Parse a single sheet from the opened workbook"""
+        if self._excel_file is None:
+            self._excel_file = pd.ExcelFile(self.file_path)
+        return self._excel_file.parse(sheet_name)
+    
+    def _resolve_table(self, sheet_name: Optional[str]) -> Optional[str]:
+        """Map an optional sheet name to a table name, defaulting to the first table"""
+        if sheet_name is not None:
+            if sheet_name not in self.table_names:
+                raise KeyError(f"Sheet '{sheet_name}' not found")
+            return sheet_name
+        return self.table_names[0] if self.table_names else None
+    
+    def read_table(self, sheet_name: Optional[str] = None,
+                   columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Get a private copy of a parsed table, served from the columnar cache"""
+        table_name = self._resolve_table(sheet_name)
+        if table_name is None:
+            return pd.DataFrame()
+        
+        if columnar_cache.has(self.file_hash, table_name):
+            return columnar_cache.read(self.file_hash, table_name, columns)
+        
+        # Table could not be cached - copy the in-memory frame instead
+        df = self._tables[table_name]
+        return (df[columns] if columns is not None else df).copy()
+    
+    def get_table_schema(self, sheet_name: Optional[str] = None) -> Dict[str, str]:
+        """Get column names and dtypes of a table without materializing it"""
+        table_name = self._resolve_table(sheet_name)
+        if table_name is None:
+            return {}
+        
+        if columnar_cache.has(self.file_hash, table_name):
+            return columnar_cache.read_schema(self.file_hash, table_name)
+        
+        df = self._tables[table_name]
+        return {col: str(dtype) for col, dtype in zip(df.columns, df.dtypes)}
+    
+    def _read_sheet_metadata(self, sheet_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Read sheet dimensions and header rows without parsing the cell data"""
+        metadata = {}
+        book = self._excel_file.book
+        for sheet_name in sheet_names:
+            rows, column_names = None, []
+            try:
+                if self._excel_file.engine == "openpyxl":
+                    worksheet = book[sheet_name]
+                    header = next(worksheet.iter_rows(min_row=1, max_row=1, max_col=worksheet.max_column,
+                                                      values_only=True), ())
+                    column_names = _header_names(header)
+                    if worksheet.max_row is not None:
+                        rows = max(worksheet.max_row - 1, 0)
+                elif self._excel_file.engine == "xlrd":
+                    worksheet = book.sheet_by_name(sheet_name)
+                    column_names = _header_names(worksheet.row_values(0) if worksheet.nrows else [])
+                    rows = max(worksheet.nrows - 1, 0)
+                else:
+                    column_names = self._excel_file.parse(sheet_name, nrows=0).columns.tolist()
+            except Exception as e:
+                print(f"Could not read metadata for sheet {sheet_name}: {str(e)}")
+            metadata[sheet_name] = {
+                "rows": rows,
+                "columns": len(column_names),
+                "column_names": column_names
+            }
+        return metadata
+    
+    def view(self) -> "DataProcessor":
+        """Create a processor sharing this one's parsed frames but with its own active sheet"""
+        clone = copy.copy(self)
+        # The workbook handle stays owned by the original processor
+        clone._excel_file = None
+        return clone
+    
+    def _sheet_view(self, sheet_name: str) -> "DataProcessor":
+        """Create a processor sharing this one's parsed frames with another sheet active"""
+        clone = self.view()
+        clone.active_sheet = sheet_name
+        return clone
+    
+    def sample_view(self, rows: int) -> Optional["DataProcessor"]:
+        """Create a processor over a uniform sample of the active table, or None if it is small already"""
+        if self.profile is not None:
+            # Streamed CSVs are answered from their ingestion profile, which is already cheap
+            return None
+        df = self.df
+        if df is None or len(df) <= rows:
+            return None
+        
+        clone = self.view()
+        clone._tables = {self._resolve_table(self.active_sheet): df.sample(n=rows, random_state=0).sort_index()}
+        clone._indexes = ColumnIndexes()
+        # Sample results must not be cached under the full dataset's hash
+        clone.file_hash = None
+        return clone
+    
+    def memory_footprint(self) -> int:
+        """Get the bytes held in memory by this processor's loaded tables and column indexes"""
+        tables = self._tables.memory_usage() if self._tables else 0
+        return tables + self._indexes.memory_usage()
+    
+    def spill(self) -> int:
+        """Drop loaded tables (kept in the columnar cache) and column indexes from memory; returns bytes freed"""
+        freed = self._indexes.clear()
+        if not self._tables:
+            return freed
+        
+        def ensure_cached(table_name: str, df: pd.DataFrame) -> bool:
+            # Tables Arrow cannot store stay in memory rather than being re-parsed
+            return (columnar_cache.has(self.file_hash, table_name)
+                    or columnar_cache.write(self.file_hash, table_name, df))
+        
+        return freed + self._tables.unload_all(ensure_cached)
+    
+    def close(self):
+        """Release the open workbook handle, if any"""
+        if self._excel_file is not None:
+            self._excel_file.close()
+            self._excel_file = None
+    
+    @cached_result
     def get_basic_info(self) -> Dict[str, Any]:
         """Get basic information about the dataset"""
         if self.df is None:
@@ -94,7 +370,7 @@ class DataProcessor:
                 "is_empty": True
             }
         
-        return {
+        info = {
             "rows": self.df.shape[0],
             "columns": self.df.shape[1],
             "column_names": self.df.columns.tolist(),
@@ -103,97 +379,191 @@ class DataProcessor:
             "file_hash": self.file_hash,
             "is_empty": False
         }
+        if self.profile is not None:
+            # df only holds a sample of a streamed CSV
+            info["rows"] = self.profile["rows"]
+            info["sampled"] = True
+            info["sample_rows"] = self.profile["sample_rows"]
+        return info
+    
+    @cached_result
+    def get_sketch_profile(self) -> FrameProfile:
+        """Sketch every column of the active table in one streaming pass"""
+        return profile_frame(self.df)
     
-    def get_column_stats(self) -> Dict[str, Any]:
-        """Get detailed statistics for each column"""
+    @cached_result
+    def get_column_stats(self, approximate: bool = False) -> Dict[str, Any]:
+        """Get detailed statistics for each column, estimated from sketches if approximate"""
         if self.df is None or self.df.empty:
             return {}
+        if self.profile is not None:
+            # Profiled while the file was streamed in
+            return self.profile["column_stats"]
+        if approximate:
+            return profile_column_stats(self.get_sketch_profile())
+        return compute_column_stats(self.df, value_counts=self.get_value_counts)
+    
+    @cached_result
+    def get_value_counts(self, column: str) -> pd.Series:
+        """Value counts of a column, most frequent first; shared by column stats and distributions"""
+        return self.df[column].value_counts()
+    
+    @cached_result
+    def get_string_view(self, column: str) -> pd.Series:
+        """A column's values printed as text, as the text filters compare them"""
+        return self.df[column].astype(str)
+    
+    def get_column_index(self, column: str, kind: str) -> Any:
+        """Equality or sorted index of a column of the active table, built on first use; None if unsupported"""
+        if kind not in INDEX_KINDS:
+            raise ValueError(f"Unsupported index kind: {kind}")
+        series = self.df[column]
+        if kind == "equality":
+            build = lambda: equality_index(series, lambda: self.get_string_view(column))
+        elif kind == "sorted":
+            build = lambda: sorted_index(series)
+        else:
+            # Scanning a few distinct values is already cheap
+            def build():
+                printed = self.get_column_index(column, "equality").printed
+                return trigram_index(printed) if len(printed) >= TRIGRAM_MIN_VALUES else None
+        return self._indexes.get((self._resolve_table(self.active_sheet), column, kind), build)
+    
+    def filter_rows(self, filters: List[Dict[str, Any]]) -> np.ndarray:
+        """Positions of the rows matching every filter condition, using the column indexes"""
+        if self.profile is None:
+            return filter_positions(self.df, filters, self.get_string_view, self.get_column_index)
         
-        stats = {}
-        for col in self.df.columns:
-            col_data = self.df[col]
-            dtype = col_data.dtype
-            
-            col_stats = {
-                "name": col,
-                "dtype": str(dtype),
-                "null_count": int(col_data.isnull().sum()),
-                "null_percentage": (col_data.isnull().sum() / len(col_data) * 100) if len(col_data) > 0 else 0,
-                "unique_count": int(col_data.nunique()),
-                "unique_percentage": (col_data.nunique() / len(col_data) * 100) if len(col_data) > 0 else 0
-            }
-            
-            # Numeric columns
-            if np.issubdtype(dtype, np.number):
-                # Calculate stats directly
-                col_stats.update({
-                    "mean": float(col_data.mean()) if not pd.isna(col_data.mean()) else None,
-                    "std": float(col_data.std()) if not pd.isna(col_data.std()) else None,
-                    "min": float(col_data.min()) if not pd.isna(col_data.min()) else None,
-                    "25%": float(col_data.quantile(0.25)) if not pd.isna(col_data.quantile(0.25)) else None,
-                    "50%": float(col_data.median()) if not pd.isna(col_data.median()) else None,
-                    "75%": float(col_data.quantile(0.75)) if not pd.isna(col_data.quantile(0.75)) else None,
-                    "max": float(col_data.max()) if not pd.isna(col_data.max()) else None,
-                    "column_type": "numeric"
-                })
-            
-            # Categorical/String columns
-            elif dtype == object or pd.api.types.is_string_dtype(dtype):
-                value_counts = col_data.value_counts().head(10)
-                col_stats.update({
-                    "top_values": [{"value": str(idx), "count": int(count)} 
-                                  for idx, count in value_counts.items()],
-                    "column_type": "categorical"
-                })
-            
-            # Date columns
-            elif pd.api.types.is_datetime64_any_dtype(dtype):
-                col_stats.update({
-                    "min": str(col_data.min()),
-                    "max": str(col_data.max()),
-                    "column_type": "datetime"
-                })
-            
-            # Boolean columns
-            elif dtype == bool or pd.api.types.is_bool_dtype(dtype):
-                value_counts = col_data.value_counts()
-                col_stats.update({
-                    "true_count": int(value_counts.get(True, 0)),
-                    "false_count": int(value_counts.get(False, 0)),
-                    "column_type": "boolean"
-                })
-            
-            stats[col] = col_stats
-        
-        return stats
+        # Only a sample is in memory, so filter the whole table in the columnar cache a batch at a time
+        columns = list(dict.fromkeys(column for column, _, _ in compile_filters(filters)))
+        missing = [col for col in columns if col not in self.df.columns]
+        if missing:
+            raise ValueError(f"Column not found: {missing[0]}")
+        if not columns:
+            return np.arange(self.row_count())
+        positions, offset = [], 0
+        for table in columnar_cache.iter_batches(self.file_hash, DEFAULT_TABLE, columns):
+            batch = table.to_pandas()
+            found = filter_positions(batch, filters, lambda column: batch[column].astype(str))
+            positions.append(found + offset)
+            offset += table.num_rows
+        return np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+    
+    def row_count(self) -> int:
+        """Rows of the whole active table, not only the sample held for streamed CSVs"""
+        return self.profile["rows"] if self.profile is not None else len(self.df)
+    
+    def take_rows(self, positions: np.ndarray, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Rows of the whole active table at the given positions, with all or the given columns"""
+        self._check_columns(columns)
+        if self.profile is None:
+            return (self.df if columns is None else self.df[columns]).take(positions)
+        # Streamed CSVs read the rows back from the memory-mapped columnar cache
+        return columnar_cache.read_table(self.file_hash, DEFAULT_TABLE, columns).take(positions).to_pandas()
+    
+    def iter_rows(self, positions: Optional[np.ndarray] = None,
+                  columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Rows of the whole active table at the given ascending positions, or all of them, a batch at a time"""
+        self._check_columns(columns)
+        if self.profile is None:
+            frame = self.df if columns is None else self.df[columns]
+            yield frame if positions is None else frame.take(positions)
+            return
+        # Streamed CSVs never hold the whole table, only one batch of the columnar cache
+        offset, empty = 0, True
+        for table in columnar_cache.iter_batches(self.file_hash, DEFAULT_TABLE, columns):
+            rows = table.num_rows
+            if positions is not None:
+                start, stop = np.searchsorted(positions, [offset, offset + rows])
+                table = table.take(positions[start:stop] - offset)
+            offset += rows
+            if table.num_rows:
+                empty = False
+                yield table.to_pandas()
+        if empty:
+            yield self.df.iloc[:0] if columns is None else self.df[columns].iloc[:0]
+    
+    def _check_columns(self, columns: Optional[List[str]]):
+        if columns is not None:
+            missing = [col for col in columns if col not in self.df.columns]
+            if missing:
+                raise ValueError(f"Columns not found: {', '.join(map(str, missing))}")
     
-    def get_correlations(self) -> Dict[str, Any]:
-        """Get correlation matrix for numeric columns"""
+    @cached_result
+    def get_group_index(self, keys: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Rows of every group of the key columns, as CSR arrays with each group's first row"""
+        if not keys:
+            raise ValueError("No group columns given")
+        missing = [col for col in keys if col not in self.df.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {', '.join(map(str, missing))}")
+        return group_index(self._full_frame(list(keys)), list(keys))
+    
+    def group_by(self, keys: Tuple[str, ...],
+                 aggregates: List[Tuple[Optional[str], str, str]]) -> pd.DataFrame:
+        """Aggregate (column, func, name) triples per group of the key columns, one output column each"""
+        # Grouping again with other aggregates reuses the cached group index
+        index = self.get_group_index(tuple(keys))
+        # Streamed CSVs read back only the key and aggregated columns in full
+        columns = list(keys) + [column for column, _, _ in aggregates if column is not None]
+        frame = self._full_frame([col for col in dict.fromkeys(columns) if col in self.df.columns])
+        return group_table(frame, keys, aggregates, index)
+    
+    def get_group_rows(self, keys: Tuple[str, ...], group: Optional[int] = None,
+                       values: Optional[Tuple[str, ...]] = None, columns: Optional[Tuple[str, ...]] = None,
+                       offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """Get a page of one group's rows, picked by its number in the group-by result or by its key values as text"""
+        index = self.get_group_index(tuple(keys))
+        projected = list(columns) if columns else None
+        missing = [col for col in projected or [] if col not in self.df.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {', '.join(map(str, missing))}")
+        return convert_numpy_types(group_rows(self._full_frame(list(keys)), keys, index,
+                                              lambda page: self.take_rows(page, projected),
+                                              group, values, offset, limit))
+    
+    @cached_result
+    def get_correlations(self, method: str = "pearson", mode: str = "matrix",
+                         top_k: Optional[int] = None, threshold: float = 0.0) -> Dict[str, Any]:
+        """Get correlations of numeric columns as a nested matrix, a compact array matrix or the strongest pairs"""
         if self.df is None or self.df.empty:
             return {}
+        if mode not in CORRELATION_MODES:
+            raise ValueError(f"Unsupported correlation mode: {mode}")
         
         # Select only numeric columns
-        numeric_df = self.df.select_dtypes(include=[np.number])
-        numeric_cols = numeric_df.columns.tolist()
+        numeric_cols = self.df.select_dtypes(include=[np.number]).columns.tolist()
         
         if len(numeric_cols) < 2:
             return {"message": "Not enough numeric columns for correlation analysis"}
         
-        # Calculate correlation matrix using Pandas
-        corr_matrix = numeric_df.corr()
-        
-        # Convert to dictionary format
-        correlations = {}
-        for col1 in numeric_cols:
-            correlations[col1] = {}
-            for col2 in numeric_cols:
-                corr_value = corr_matrix.loc[col1, col2]
-                correlations[col1][col2] = float(corr_value) if not pd.isna(corr_value) else 0.0
+        matrix = correlation_matrix(self.df, numeric_cols, method)
         
-        return {
-            "matrix": correlations,
-            "columns": numeric_cols
-        }
+        if mode == "pairs":
+            result = {
+                "method": method,
+                "columns": numeric_cols,
+                "pairs": strongest_pairs(numeric_cols, matrix, top_k, threshold)
+            }
+        elif mode == "compact":
+            # Row i holds column i's correlations in column order; null where undefined
+            result = {
+                "method": method,
+                "columns": numeric_cols,
+                "values": [[None if np.isnan(value) else value for value in row] for row in matrix.tolist()]
+            }
+        else:
+            # Nested dictionary format, with undefined correlations reported as 0
+            rows = np.nan_to_num(matrix, nan=0.0).tolist()
+            result = {
+                "matrix": {col: dict(zip(numeric_cols, row)) for col, row in zip(numeric_cols, rows)},
+                "columns": numeric_cols
+            }
+        if self.profile is not None:
+            # Estimated from the random sample of a streamed CSV
+            result["sampled"] = True
+            result["sample_rows"] = len(self.df)
+        return result
     
     def get_data_sample(self, n: int = 100) -> List[Dict]:
         """Get a sample of the data"""
@@ -205,13 +575,30 @@ class DataProcessor:
         sample_dict = sample.to_dict('records')
         return [convert_numpy_types(record) for record in sample_dict]
     
-    def get_value_distribution(self, column: str, bins: int = 20) -> Dict[str, Any]:
-        """Get distribution of values for a column"""
+    @cached_result
+    def get_value_distribution(self, column: str, bins: int = 20,
+                               approximate: bool = False) -> Dict[str, Any]:
+        """Get distribution of values for a column, estimating medians and top values if approximate"""
         if self.df is None or self.df.empty or column not in self.df.columns:
             return {}
-        
+        sketches = self.get_sketch_profile() if approximate else None
+        return self._value_distribution(column, bins, sketches)
+    
+    def _value_distribution(self, column: str, bins: int, sketches: Optional[FrameProfile]) -> Dict[str, Any]:
+        if not pd.api.types.is_numeric_dtype(self.df[column].dtype) and self.get_datetime_values(column) is not None:
+            return self._datetime_distribution(column)
+        if self.profile is not None:
+            streamed = self._streamed_distribution(column, bins)
+            if streamed is not None:
+                return streamed
+            # Not profiled while streaming, so only the in-memory sample describes it
+            return {**self._sample_distribution(column, bins, sketches), "sampled": True}
+        return self._sample_distribution(column, bins, sketches)
+    
+    def _sample_distribution(self, column: str, bins: int, sketches: Optional[FrameProfile]) -> Dict[str, Any]:
         col_data = self.df[column]
         dtype = col_data.dtype
+        profile = sketches.columns[column] if sketches is not None else None
         
         # Numeric distribution
         if np.issubdtype(dtype, np.number):
@@ -242,31 +629,29 @@ class DataProcessor:
                 "min": min_val,
                 "max": max_val,
                 "mean": float(clean_data.mean()),
-                "median": float(clean_data.median())
+                "median": (profile.quantiles.quantiles([0.5])[0] if profile is not None
+                           else float(clean_data.median()))
             }
         
         # Categorical distribution
         elif dtype == object or pd.api.types.is_string_dtype(dtype) or pd.api.types.is_categorical_dtype(dtype):
-            value_counts = col_data.value_counts().head(50)
+            if profile is not None and profile.frequent is not None:
+                return {
+                    "type": "categorical",
+                    "values": [{"value": str(value), "count": count}
+                              for value, count in profile.frequent.top(50)],
+                    "max_count_error": profile.frequent.error
+                }
+            value_counts = self.get_value_counts(column).head(50)
             return {
                 "type": "categorical",
                 "values": [{"value": str(idx), "count": int(count)} 
                           for idx, count in value_counts.items()]
             }
         
-        # Date distribution
-        elif pd.api.types.is_datetime64_any_dtype(dtype):
-            clean_data = col_data.dropna()
-            return {
-                "type": "datetime",
-                "min": str(col_data.min()),
-                "max": str(col_data.max()),
-                "count": len(clean_data)
-            }
-        
         # Boolean distribution
         elif dtype == bool or pd.api.types.is_bool_dtype(dtype):
-            value_counts = col_data.value_counts()
+            value_counts = self.get_value_counts(column)
             return {
                 "type": "boolean",
                 "values": [{"value": str(idx), "count": int(count)} 
@@ -275,10 +660,98 @@ class DataProcessor:
         
         return {"error": "Unsupported column type"}
     
-    def detect_patterns(self) -> Dict[str, Any]:
-        """Detect patterns and anomalies in the data"""
+    def _datetime_distribution(self, column: str) -> Dict[str, Any]:
+        """Distribution of a date column as counts per automatically sized time bucket"""
+        series = self.get_time_series(column, values=())
+        return {
+            "type": "datetime",
+            "min": series["min"],
+            "max": series["max"],
+            "count": series["count"],
+            "parsed_from_text": series["parsed_from_text"],
+            "timeline": {key: series[key] for key in ("granularity", "starts", "counts")}
+        }
+    
+    def _streamed_distribution(self, column: str, bins: int) -> Optional[Dict[str, Any]]:
+        """Distribution of a streamed CSV column from its ingestion profile, if it was precomputed"""
+        stats = self.profile["column_stats"].get(column, {})
+        if stats.get("column_type") == "numeric":
+            if stats["min"] is None:
+                return {"error": "No non-null values"}
+            histogram = self.profile["histograms"].get(column)
+            if stats["min"] != stats["max"] and (histogram is None or bins != PROFILE_BINS):
+                # Other resolutions scan the whole column
+                edges, counts = self._streamed_histogram(column, bins)
+                histogram = {"edges": edges.tolist(), "counts": counts.tolist()}
+            edges = histogram["edges"] if histogram else []
+            return {
+                "type": "numeric",
+                "histogram": [
+                    {
+                        "range": f"{edges[i]:.2f} - {edges[i + 1]:.2f}",
+                        "count": count,
+                        "min": edges[i],
+                        "max": edges[i + 1]
+                    }
+                    for i, count in enumerate(histogram["counts"] if histogram else [])
+                ],
+                "min": stats["min"],
+                "max": stats["max"],
+                "mean": stats["mean"],
+                "median": stats["50%"]
+            }
+        
+        top_values = self.profile["top_values"].get(column)
+        if top_values is not None:
+            return {
+                "type": "categorical",
+                "values": [{"value": value, "count": count} for value, count in top_values["values"]],
+                "max_count_error": top_values["max_count_error"]
+            }
+        return None
+    
+    @cached_result
+    def _streamed_histogram(self, column: str, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Equal-width histogram of a streamed CSV column, read a batch at a time from the columnar cache"""
+        stats = self.profile["column_stats"][column]
+        edges = np.linspace(stats["min"], stats["max"], bins + 1)
+        counts = np.zeros(bins, dtype=np.int64)
+        for table in columnar_cache.iter_batches(self.file_hash, DEFAULT_TABLE, [column]):
+            values = table.column(column).to_numpy(zero_copy_only=False).astype(np.float64)
+            counts += np.histogram(values[~np.isnan(values)], bins=edges)[0]
+        return edges, counts
+    
+    def _streamed_patterns(self) -> Dict[str, Any]:
+        """Patterns of a streamed CSV from its ingestion profile"""
+        rows = self.profile["rows"]
+        column_stats = self.profile["column_stats"]
+        return {
+            "missing_data": {
+                col: {"count": stats["null_count"], "percentage": stats["null_count"] / rows * 100}
+                for col, stats in column_stats.items() if stats["null_count"] > 0
+            },
+            "outliers": self.profile["outliers"],
+            "data_quality": {
+                # Finding duplicates exactly would need every row in memory
+                "duplicate_rows": None,
+                "columns_with_single_value": [
+                    col for col, stats in column_stats.items() if stats["unique_count"] == 1
+                ]
+            },
+            "error_bounds": {
+                "outlier_bounds_rank": max((stats["error_bounds"].get("quantile_rank", 0.0)
+                                            for stats in column_stats.values()), default=0.0)
+            }
+        }
+    
+    @cached_result
+    def detect_patterns(self, approximate: bool = False) -> Dict[str, Any]:
+        """Detect patterns and anomalies in the data, using sketched quartiles and distinct counts if approximate"""
         if self.df is None or self.df.empty:
             return {}
+        if self.profile is not None:
+            return self._streamed_patterns()
+        profile = self.get_sketch_profile() if approximate else None
         
         patterns = {
             "missing_data": {},
@@ -286,61 +759,316 @@ class DataProcessor:
             "data_quality": {}
         }
         
+        df = self.df
+        
         # Missing data patterns
-        for col in self.df.columns:
-            null_count = int(self.df[col].isnull().sum())
+        for col, null_count in zip(df.columns, column_executor.map(lambda col: int(df[col].isnull().sum()),
+                                                                   df.columns)):
             if null_count > 0:
                 patterns["missing_data"][col] = {
                     "count": null_count,
-                    "percentage": (null_count / len(self.df)) * 100
+                    "percentage": (null_count / len(df)) * 100
                 }
         
         # Detect outliers in numeric columns using IQR method
-        numeric_cols = self.df.select_dtypes(include=[np.number]).columns.tolist()
-        
-        for col in numeric_cols:
-            col_data = self.df[col].dropna()
-            if len(col_data) > 0:
-                q1 = col_data.quantile(0.25)
-                q3 = col_data.quantile(0.75)
-                iqr = q3 - q1
-                lower_bound = q1 - 1.5 * iqr
-                upper_bound = q3 + 1.5 * iqr
-                
-                # Filter outliers using boolean mask
-                outliers = col_data[(col_data < lower_bound) | (col_data > upper_bound)]
-                if len(outliers) > 0:
-                    patterns["outliers"][col] = {
-                        "count": len(outliers),
-                        "percentage": (len(outliers) / len(col_data)) * 100,
-                        "lower_bound": float(lower_bound),
-                        "upper_bound": float(upper_bound)
-                    }
+        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        quartiles = None
+        if profile is not None:
+            quartiles = {col: tuple(profile.columns[col].quantiles.quantiles([0.25, 0.75]))
+                         for col in numeric_cols if profile.columns[col].count > 0}
+        patterns["outliers"] = detect_outliers(df, numeric_cols, "iqr", quartiles)
         
         # Data quality checks
-        patterns["data_quality"]["duplicate_rows"] = int(self.df.duplicated().sum())
-        patterns["data_quality"]["columns_with_single_value"] = [
-            col for col in self.df.columns if self.df[col].nunique() == 1
-        ]
+        patterns["data_quality"]["duplicate_rows"] = self.count_duplicates()
+        if profile is not None:
+            patterns["data_quality"]["columns_with_single_value"] = [
+                col for col, column in profile.columns.items() if column.distinct_count() == 1
+            ]
+            patterns["error_bounds"] = {
+                "outlier_bounds_rank": max((column.quantiles.rank_error for column in profile.columns.values()
+                                            if column.quantiles is not None), default=0.0)
+            }
+        else:
+            # Distinct counts come from the cached column stats rather than another pass per column
+            stats = self.get_column_stats()
+            patterns["data_quality"]["columns_with_single_value"] = [
+                col for col in self.df.columns if stats[col]["unique_count"] == 1
+            ]
         
         return patterns
     
+    @cached_result
+    def get_outliers(self, method: str = "iqr") -> Dict[str, Any]:
+        """Get outlier bounds and counts of every numeric column by the IQR, z-score or MAD method"""
+        if self.df is None or self.df.empty:
+            return {}
+        if self.profile is not None:
+            if method != "iqr":
+                raise ValueError("Only IQR outliers are available for streamed tables")
+            return {"method": method, "outliers": self.profile["outliers"]}
+        
+        numeric_cols = self.df.select_dtypes(include=[np.number]).columns.tolist()
+        return {"method": method, "outliers": detect_outliers(self.df, numeric_cols, method)}
+    
+    def get_outlier_rows(self, column: str, method: str = "iqr", offset: int = 0,
+                         limit: int = 100) -> Dict[str, Any]:
+        """Get a page of the rows holding a numeric column's outliers, in row order"""
+        if column not in self.df.columns or not pd.api.types.is_numeric_dtype(self.df[column].dtype) \
+                or pd.api.types.is_bool_dtype(self.df[column].dtype):
+            raise ValueError(f"Column '{column}' is not a numeric column")
+        
+        positions, values, lower, upper = self._outlier_rows(column, method)
+        return {
+            "column": column,
+            "method": method,
+            "lower_bound": lower,
+            "upper_bound": upper,
+            "total": len(positions),
+            "offset": offset,
+            "limit": limit,
+            "rows": [{"row": int(position), "value": value}
+                     for position, value in zip(positions[offset:offset + limit].tolist(),
+                                                values[offset:offset + limit].tolist())]
+        }
+    
+    @cached_result
+    def _outlier_rows(self, column: str, method: str) -> Tuple[np.ndarray, np.ndarray, Optional[float], Optional[float]]:
+        """Positions and values of a column's outliers, with the bounds that define them"""
+        if self.profile is None:
+            series = self.df[column]
+            positions, lower, upper = outlier_positions(series, method)
+            return positions, series.to_numpy()[positions], lower, upper
+        
+        if method != "iqr":
+            raise ValueError("Only IQR outliers are available for streamed tables")
+        bounds = self.profile["outliers"].get(column)
+        if bounds is None:
+            return np.empty(0, dtype=np.int64), np.empty(0), None, None
+        # Only a sample is in memory, so scan the whole column in the columnar cache
+        lower, upper = bounds["lower_bound"], bounds["upper_bound"]
+        positions, values, offset = [], [], 0
+        for table in columnar_cache.iter_batches(self.file_hash, DEFAULT_TABLE, [column]):
+            batch = table.column(column).to_numpy(zero_copy_only=False).astype(np.float64)
+            found = np.flatnonzero((batch < lower) | (batch > upper))
+            positions.append(found + offset)
+            values.append(batch[found])
+            offset += len(batch)
+        if not positions:
+            # A table without rows has no batches
+            return np.empty(0, dtype=np.int64), np.empty(0), lower, upper
+        return np.concatenate(positions), np.concatenate(values), lower, upper
+    
+    def _duplicate_columns(self, columns: Optional[Tuple[str, ...]]) -> Tuple[str, ...]:
+        if self.profile is not None:
+            raise ValueError("Duplicate rows of a streamed table cannot be found from its in-memory sample")
+        if columns is None:
+            return tuple(self.df.columns)
+        missing = [col for col in columns if col not in self.df.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {', '.join(map(str, missing))}")
+        return tuple(columns)
+    
+    @cached_result
+    def get_row_hashes(self, columns: Optional[Tuple[str, ...]] = None) -> np.ndarray:
+        """64-bit hash of every row over all columns or the given ones"""
+        return row_hashes(self.df, list(self._duplicate_columns(columns)))
+    
+    @cached_result
+    def _duplicate_groups(self, columns: Optional[Tuple[str, ...]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Groups of identical rows: row positions ordered by group, and the offset of each group"""
+        selected = list(self._duplicate_columns(columns))
+        return duplicate_groups(self.df, selected, self.get_row_hashes(columns))
+    
+    def count_duplicates(self, columns: Optional[Tuple[str, ...]] = None) -> int:
+        """Count rows repeating an earlier row, like DataFrame.duplicated().sum()"""
+        if self.df is None or self.df.empty:
+            return 0
+        positions, offsets = self._duplicate_groups(columns)
+        return len(positions) - (len(offsets) - 1)
+    
+    def duplicate_mask(self, columns: Optional[Tuple[str, ...]] = None,
+                       rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Mark rows repeating an earlier row, like DataFrame.duplicated(keep="first"), among all rows or the given ascending positions"""
+        mask = np.zeros(len(self.df) if rows is None else len(rows), dtype=bool)
+        if len(mask) == 0:
+            return mask
+        positions, offsets = self._duplicate_groups(columns)
+        if rows is None:
+            mask[positions] = True
+            # The first row of each group is the original
+            mask[positions[offsets[:-1]]] = False
+            return mask
+        # Among a subset of rows, the original is the first of each group's rows in it
+        labels = np.full(len(self.df), -1, dtype=np.int64)
+        labels[positions] = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        picked = labels[rows]
+        grouped = np.flatnonzero(picked >= 0)
+        _, firsts = np.unique(picked[grouped], return_index=True)
+        mask[grouped] = True
+        mask[grouped[firsts]] = False
+        return mask
+    
+    def get_duplicates(self, columns: Optional[Tuple[str, ...]] = None, offset: int = 0,
+                       limit: int = 50, rows_per_group: int = 20) -> Dict[str, Any]:
+        """Get a page of the groups of identical rows, each listing the positions of its rows"""
+        selected = self._duplicate_columns(columns) if self.df is not None else ()
+        if self.df is None or self.df.empty:
+            positions, offsets = np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+        else:
+            positions, offsets = self._duplicate_groups(columns)
+        group_count = len(offsets) - 1
+        groups = []
+        for group in range(offset, min(offset + limit, group_count)):
+            rows = positions[offsets[group]:offsets[group + 1]]
+            groups.append({
+                "count": len(rows),
+                "rows": rows[:rows_per_group].tolist()
+            })
+        return {
+            "columns": list(selected),
+            "duplicate_rows": len(positions) - group_count,
+            "group_count": group_count,
+            "offset": offset,
+            "limit": limit,
+            "groups": groups
+        }
+    
     def compute_correlations(self) -> Dict[str, Any]:
         """Alias for get_correlations for compatibility"""
         return self.get_correlations()
     
-    def detect_patterns_and_anomalies(self) -> Dict[str, Any]:
+    def detect_patterns_and_anomalies(self, approximate: bool = False) -> Dict[str, Any]:
         """Alias for detect_patterns for compatibility"""
-        return self.detect_patterns()
+        return self.detect_patterns(approximate=approximate)
     
-    def get_value_distributions(self) -> Dict[str, Any]:
-        """Get distributions for all columns"""
+    @cached_result
+    def get_value_distributions(self, approximate: bool = False, columns: Optional[Tuple[str, ...]] = None,
+                                compact: bool = False) -> Dict[str, Any]:
+        """Get distributions for all columns or only the given ones; compact gives arrays of edges/values and counts"""
         if self.df is None or self.df.empty:
             return {}
-        distributions = {}
-        for col in self.df.columns:
-            distributions[col] = self.get_value_distribution(col)
-        return distributions
+        selected = self.df.columns if columns is None else [col for col in columns if col in self.df.columns]
+        
+        if approximate or self.profile is not None:
+            # The sketch profile is built once, before the columns fan out
+            sketches = self.get_sketch_profile() if approximate else None
+            distributions = column_executor.map_columns(
+                lambda col: self._value_distribution(col, 20, sketches), selected)
+            if compact:
+                return {col: compact_distribution(distribution) for col, distribution in distributions.items()}
+            return distributions
+        
+        # Extremes, means and medians come from the column stats, so numeric columns need one binning pass
+        stats = self.get_column_stats()
+        numeric = {col for col in selected
+                   if stats[col].get("column_type") == "numeric" and isinstance(self.df[col].dtype, np.dtype)}
+        binned = [col for col in selected if col in numeric and stats[col]["min"] is not None and stats[col]["min"] != stats[col]["max"]]
+        histograms = histogram_counts(self.df, binned, 20, {col: (stats[col]["min"], stats[col]["max"])
+                                                            for col in binned})
+        
+        def distribution(col: str) -> Dict[str, Any]:
+            col_stats = stats[col]
+            if col in numeric:
+                if col_stats["min"] is None:
+                    return {"error": "No non-null values"}
+                edges, counts = histograms.get(col, (np.empty(0), np.empty(0, dtype=np.int64)))
+                return {
+                    "type": "numeric",
+                    "edges": edges.tolist(),
+                    "counts": counts.tolist(),
+                    "min": col_stats["min"],
+                    "max": col_stats["max"],
+                    "mean": col_stats["mean"],
+                    "median": col_stats["50%"]
+                }
+            if col_stats.get("column_type") == "categorical" and self.get_datetime_values(col) is not None:
+                return self._datetime_distribution(col)
+            if col_stats.get("column_type") in ("categorical", "boolean"):
+                # Same value counts the column stats were computed from
+                value_counts = self.get_value_counts(col)
+                if col_stats["column_type"] == "categorical":
+                    value_counts = value_counts.head(50)
+                return {
+                    "type": col_stats["column_type"],
+                    "values": [str(value) for value in value_counts.index],
+                    "counts": value_counts.tolist()
+                }
+            return compact_distribution(self._value_distribution(col, 20, None))
+        
+        distributions = {col: distribution(col) for col in selected}
+        if compact:
+            return distributions
+        return {col: expand_distribution(distribution) for col, distribution in distributions.items()}
+    
+    def _full_frame(self, columns: List[str]) -> pd.DataFrame:
+        """Columns of the whole active table, read back from the columnar cache for streamed CSVs"""
+        if self.profile is None:
+            return self.df[columns]
+        return columnar_cache.read_table(self.file_hash, DEFAULT_TABLE, columns).to_pandas()
+    
+    @cached_result
+    def get_datetime_values(self, column: str) -> Optional[pd.Series]:
+        """A column as timestamps, inferring the format of dates stored as text, or None if it holds no dates"""
+        return infer_datetimes(self._full_frame([column])[column])
+    
+    @cached_result
+    def get_time_index(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted timestamps of a date column and their row positions; built once and shared by every bucketing"""
+        times = self.get_datetime_values(column)
+        if times is None:
+            raise ValueError(f"Column {column} does not hold dates")
+        return time_index(times)
+    
+    @cached_result
+    def get_time_series(self, column: str, granularity: str = "auto",
+                        values: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        """Row counts and numeric aggregates per day, week or month of a date column"""
+        if self.df is None or self.df.empty:
+            return {}
+        if column not in self.df.columns:
+            raise ValueError(f"Column not found: {column}")
+        if granularity != "auto" and granularity not in TIME_GRANULARITIES:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        if values is None:
+            # Streamed tables only aggregate the columns asked for, since each is read back in full
+            values = () if self.profile is not None else tuple(
+                col for col in self.df.select_dtypes(include=[np.number]).columns if col != column)
+        missing = [col for col in values if col not in self.df.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {', '.join(map(str, missing))}")
+        
+        stamps, order = self.get_time_index(column)
+        series = {
+            "column": column,
+            "granularity": None if granularity == "auto" else granularity,
+            "parsed_from_text": not pd.api.types.is_datetime64_any_dtype(self.df[column].dtype),
+            "min": None,
+            "max": None,
+            "count": len(stamps),
+            "starts": [],
+            "counts": [],
+            "aggregates": {}
+        }
+        if len(stamps) == 0:
+            return series
+        
+        first, last = int(stamps[0]), int(stamps[-1])
+        if granularity == "auto":
+            granularity = choose_granularity(first, last)
+        # Buckets are runs of the sorted index, found by binary search on their bounds
+        bounds = bucket_bounds(first, last, granularity)
+        offsets = np.searchsorted(stamps, bounds)
+        aggregates = bucket_aggregates(self._full_frame(list(values)), list(values), order, offsets) if values else {}
+        series.update({
+            "granularity": granularity,
+            "min": str(pd.Timestamp(first)),
+            "max": str(pd.Timestamp(last)),
+            "starts": pd.to_datetime(bounds[:-1]).strftime("%Y-%m-%d").tolist(),
+            "counts": np.diff(offsets).tolist(),
+            "aggregates": {col: {stat: found.tolist() for stat, found in stats.items()}
+                           for col, stats in aggregates.items()}
+        })
+        return series
     
     def export_processed_data(self, format: str = "csv") -> bytes:
         """Export processed data in various formats"""
@@ -374,20 +1102,36 @@ class DataProcessor:
             "sheets": {}
         }
         
-        for sheet_name, df in self.sheets.items():
-            sheet_info["sheets"][sheet_name] = {
-                "rows": df.shape[0],
-                "columns": df.shape[1],
-                "column_names": df.columns.tolist(),
-                "dtypes": {col: str(dtype) for col, dtype in zip(df.columns, df.dtypes)}
-            }
+        for sheet_name in self.sheets:
+            if self.sheets.is_loaded(sheet_name):
+                df = self.sheets[sheet_name]
+                sheet_info["sheets"][sheet_name] = {
+                    "rows": df.shape[0],
+                    "columns": df.shape[1],
+                    "column_names": df.columns.tolist(),
+                    "dtypes": {col: str(dtype) for col, dtype in zip(df.columns, df.dtypes)},
+                    "loaded": True
+                }
+            else:
+                # Not parsed yet - report the cheap metadata read at upload time
+                sheet_info["sheets"][sheet_name] = {
+                    **self.sheet_metadata.get(sheet_name, {}),
+                    "dtypes": {},
+                    "loaded": False
+                }
         
         return sheet_info
     
+    def get_sheet_columns(self, sheet_name: str) -> List[str]:
+        """Get the column names of a sheet without forcing it to be parsed"""
+        if self.sheets.is_loaded(sheet_name):
+            return self.sheets[sheet_name].columns.tolist()
+        return list(self.sheet_metadata.get(sheet_name, {}).get("column_names", []))
+    
     def switch_sheet(self, sheet_name: str) -> bool:
         """Switch the active sheet for analysis"""
         if sheet_name in self.sheets:
-            self.df = self.sheets[sheet_name]
+            self.active_sheet = sheet_name
             return True
         return False
     
@@ -450,6 +1194,8 @@ class DataProcessor:
         only_sheet2 = only_sheet2[sheet2_cols]
         only_sheet2.columns = [col.replace('_sheet2', '') if col.endswith('_sheet2') else col for col in only_sheet2.columns]
         
+        duplicate_keys = self._duplicate_keys(sheet1_name, sheet2_name, key_columns)
+        
         # Find differences in matching rows
         differences = []
         if len(matching_rows) > 0:
@@ -484,7 +1230,8 @@ class DataProcessor:
                 "only_in_sheet1": len(only_sheet1),
                 "only_in_sheet2": len(only_sheet2),
                 "key_columns": key_columns,
-                "comparison_columns": comparison_columns
+                "comparison_columns": comparison_columns,
+                "duplicate_keys": duplicate_keys
             },
             "matching_rows": convert_numpy_types(matching_rows.head(100).to_dict('records')),
             "only_in_sheet1": convert_numpy_types(only_sheet1.head(100).to_dict('records')),
@@ -492,6 +1239,14 @@ class DataProcessor:
             "differences": differences[:100]  # Limit to first 100 differences
         }
     
+    def _duplicate_keys(self, sheet1_name: str, sheet2_name: str, key_columns: List[str]) -> Dict[str, int]:
+        """Rows of each sheet repeating an earlier row's key, from the cached duplicate groups"""
+        # Repeated keys multiply rows in the merge, so comparisons report them
+        return {
+            "sheet1": self._sheet_view(sheet1_name).count_duplicates(tuple(key_columns)),
+            "sheet2": self._sheet_view(sheet2_name).count_duplicates(tuple(key_columns))
+        }
+    
     def compare_sheets_full(self, sheet1_name: str, sheet2_name: str, 
                            key_columns: List[str], 
                            comparison_columns: Optional[List[str]] = None,
@@ -563,5 +1318,6 @@ class DataProcessor:
             return {
                 "matching_rows": convert_numpy_types(matching_rows.to_dict('records')),
                 "only_in_sheet1": convert_numpy_types(only_sheet1.to_dict('records')),
-                "only_in_sheet2": convert_numpy_types(only_sheet2.to_dict('records'))
+                "only_in_sheet2": convert_numpy_types(only_sheet2.to_dict('records')),
+                "duplicate_keys": self._duplicate_keys(sheet1_name, sheet2_name, key_columns)
             }
@@ -0,0 +1,75 @@
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
+
+class DatasetStore:
+    """Parsed datasets keyed by content hash and shared by every session that uploaded the same bytes"""
+
+    def __init__(self):
+        self._datasets: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _reference(self, file_hash: str, file_path: str) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._datasets.get(file_hash)
+            if entry is None:
+                entry = {
+                    "file_hash": file_hash,
+                    "file_path": file_path,
+                    "processor": None,
+                    "basic_info": None,
+                    "refcount": 0,
+                    "lock": threading.Lock()
+                }
+                self._datasets[file_hash] = entry
+            entry["refcount"] += 1
+            return entry
+
+    def acquire(self, file_hash: str, file_path: str,
+                factory: Callable[[], Any]) -> Tuple[Any, Dict[str, Any], bool]:
+        """Get a session view of the dataset for file_hash, parsing it with factory on first use.
+
+        Returns the processor view, the shared dataset entry and whether an existing dataset was reused.
+        """
+        entry = self._reference(file_hash, file_path)
+        try:
+            processor, reused = self._load(entry, file_path, factory)
+        except Exception:
+            self.release(file_hash)
+            raise
+        return processor, entry, reused
+
+    def release(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Drop one session's reference; returns the entry once nothing references it anymore"""
+        with self._lock:
+            entry = self._datasets.get(file_hash)
+            if entry is None:
+                return None
+            entry["refcount"] -= 1
+            if entry["refcount"] > 0:
+                return None
+            del self._datasets[file_hash]
+            return entry
+
+    def get(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """Get the shared entry of a dataset, if referenced"""
+        with self._lock:
+            return self._datasets.get(file_hash)
+
+    def _load(self, entry: Dict[str, Any], file_path: str,
+              factory: Callable[[], Any]) -> Tuple[Any, bool]:
+        # Concurrent uploads of the same bytes wait here for the first parse
+        with entry["lock"]:
+            reused = entry["processor"] is not None
+            if not reused:
+                processor = factory()
+                entry["basic_info"] = processor.get_basic_info()
+                entry["file_path"] = file_path
+                entry["processor"] = processor
+        return self._view(entry["processor"]), reused
+
+    @staticmethod
+    def _view(processor):
+        # Sessions keep their own active sheet, but share the parsed frames
+        return processor.view() if hasattr(processor, "view") else processor
+
+dataset_store = DatasetStore()
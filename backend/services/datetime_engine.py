@@ -0,0 +1,120 @@
+import warnings
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from services.parallel import column_executor
+from services.stats_engine import STATS_BLOCK_COLUMNS
+
+TIME_GRANULARITIES = ("day", "week", "month")
+# Automatic granularity picks the finest one giving at most this many buckets
+MAX_TIME_BUCKETS = 120
+# Share of a text column's distinct values that must parse for it to hold dates
+DATE_PARSE_RATIO = 0.95
+# Leading non-null values whose formats are tried on the whole column
+FORMAT_PROBES = 20
+
+# Weeks run Monday to Sunday
+_PERIOD_FREQS = {"day": "D", "week": "W-SUN", "month": "M"}
+
+def infer_datetimes(series: pd.Series) -> Optional[pd.Series]:
+    """A column's values as naive UTC timestamps, parsing text dates, or None if it does not hold dates.
+
+    Text columns are parsed one distinct value at a time with each format guessed from
+    their leading values, keeping the format that parses the most of them.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        if getattr(series.dt, "tz", None) is not None:
+            return series.dt.tz_convert(None)
+        return series
+    if not (dtype == object or pd.api.types.is_string_dtype(dtype)):
+        return None
+
+    probes = [value for value in series.head(FORMAT_PROBES * 50).dropna().unique()[:FORMAT_PROBES]
+              if isinstance(value, str)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        formats = [fmt for fmt in dict.fromkeys(guess_datetime_format(value) for value in probes) if fmt]
+    if not formats:
+        return None
+
+    codes, uniques = pd.factorize(series)
+    best, best_parsed = None, 0
+    for fmt in formats:
+        parsed = pd.to_datetime(pd.Index(uniques, dtype=object), format=fmt, errors="coerce", utc=True)
+        parsed_count = int(parsed.notna().sum())
+        if parsed_count > best_parsed:
+            best, best_parsed = parsed, parsed_count
+    if best is None or best_parsed < DATE_PARSE_RATIO * len(uniques):
+        return None
+
+    stamps = best.tz_convert(None).as_unit("ns").asi8
+    # Missing codes (-1) and unparsed values become NaT
+    values = np.where(codes >= 0, stamps[codes], np.iinfo(np.int64).min)
+    return pd.Series(values.view("datetime64[ns]"), index=series.index, name=series.name)
+
+def time_index(times: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted nanosecond timestamps of a datetime column's non-null values, with their row positions"""
+    stamps = times.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    present = np.flatnonzero(~times.isna().to_numpy())
+    order = present[np.argsort(stamps[present], kind="stable")]
+    return stamps[order], order
+
+def bucket_count(first: int, last: int, granularity: str) -> int:
+    """Number of calendar buckets of a granularity spanning two nanosecond timestamps"""
+    freq = _PERIOD_FREQS[granularity]
+    return (pd.Period(pd.Timestamp(last), freq) - pd.Period(pd.Timestamp(first), freq)).n + 1
+
+def choose_granularity(first: int, last: int) -> str:
+    """Finest granularity spanning the timestamps in at most MAX_TIME_BUCKETS buckets"""
+    for granularity in TIME_GRANULARITIES:
+        if bucket_count(first, last, granularity) <= MAX_TIME_BUCKETS:
+            return granularity
+    return TIME_GRANULARITIES[-1]
+
+def bucket_bounds(first: int, last: int, granularity: str) -> np.ndarray:
+    """Nanosecond start of every bucket spanning the timestamps, followed by the end of the last"""
+    periods = pd.period_range(pd.Timestamp(first), pd.Timestamp(last), freq=_PERIOD_FREQS[granularity])
+    starts = periods.start_time.as_unit("ns").asi8
+    return np.append(starts, (periods[-1] + 1).start_time.as_unit("ns").value)
+
+def bucket_aggregates(df: pd.DataFrame, columns: List[str], order: np.ndarray,
+                      offsets: np.ndarray) -> Dict[str, Dict[str, np.ndarray]]:
+    """Per-bucket count, sum, mean, min and max of numeric columns, a block of columns at a time.
+
+    order lists row positions in time order and offsets[i]:offsets[i + 1] the slice of it
+    falling in bucket i, so each bucket is one contiguous run for reduceat.
+    """
+    sizes = np.diff(offsets)
+    filled = sizes > 0
+    starts = offsets[:-1][filled]
+
+    def block_aggregates(block: List[str]) -> Dict[str, Dict[str, np.ndarray]]:
+        values = df[block].to_numpy(dtype="float64", na_value=np.nan)[order]
+        present = ~np.isnan(values)
+        shape = (len(sizes), len(block))
+        counts = np.zeros(shape, dtype=np.int64)
+        sums = np.zeros(shape)
+        mins = np.full(shape, np.nan)
+        maxs = np.full(shape, np.nan)
+        if len(starts):
+            counts[filled] = np.add.reduceat(present.astype(np.int64), starts, axis=0)
+            sums[filled] = np.add.reduceat(np.where(present, values, 0.0), starts, axis=0)
+            # fmin and fmax skip NaN unless the whole bucket is missing
+            mins[filled] = np.fmin.reduceat(values, starts, axis=0)
+            maxs[filled] = np.fmax.reduceat(values, starts, axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts
+        return {
+            col: {"count": counts[:, j], "sum": sums[:, j], "mean": means[:, j],
+                  "min": mins[:, j], "max": maxs[:, j]}
+            for j, col in enumerate(block)
+        }
+
+    aggregates = {}
+    for found in column_executor.map(block_aggregates, column_executor.partition(columns, STATS_BLOCK_COLUMNS)):
+        aggregates.update(found)
+    return {col: aggregates[col] for col in columns}
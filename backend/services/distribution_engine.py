@@ -0,0 +1,80 @@
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.parallel import column_executor
+from services.stats_engine import STATS_BLOCK_COLUMNS
+
+def histogram_counts(df: pd.DataFrame, columns: List[str], bins: int,
+                     ranges: Dict[str, Tuple[float, float]]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Equal-width histograms of numeric columns over known (min, max) ranges, a block at a time.
+
+    Bins values exactly as np.histogram does, so the edges and counts match it, but bins a
+    whole block of columns with one bincount.
+    """
+    def block_histograms(block: List[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        # One row per column, so every column's values are contiguous
+        values = np.ascontiguousarray(df[block].to_numpy(dtype="float64", na_value=np.nan).T)
+        firsts = np.array([ranges[col][0] for col in block], dtype="float64")[:, None]
+        lasts = np.array([ranges[col][1] for col in block], dtype="float64")[:, None]
+        edges = np.linspace(firsts[:, 0], lasts[:, 0], bins + 1, axis=1)
+        missing = np.isnan(values)
+        values[missing] = np.broadcast_to(firsts, values.shape)[missing]
+
+        # numpy's index computation, then its one-ulp corrections against the edges
+        indices = ((values - firsts) / (lasts - firsts) * bins).astype(np.intp)
+        indices[indices == bins] -= 1
+        indices[values < np.take_along_axis(edges, indices, axis=1)] -= 1
+        increment = (values >= np.take_along_axis(edges, indices + 1, axis=1)) & (indices != bins - 1)
+        indices[increment] += 1
+        # Missing values go to an extra bin per column, which is dropped
+        indices[missing] = bins
+
+        indices += np.arange(len(block))[:, None] * (bins + 1)
+        counts = np.bincount(indices.ravel(), minlength=len(block) * (bins + 1))
+        counts = counts.reshape(len(block), bins + 1)[:, :bins]
+        return {col: (edges[j], counts[j]) for j, col in enumerate(block)}
+
+    histograms = {}
+    for found in column_executor.map(block_histograms, column_executor.partition(columns, STATS_BLOCK_COLUMNS)):
+        histograms.update(found)
+    return histograms
+
+def expand_distribution(distribution: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a compact distribution (edges/counts arrays) into per-bin or per-value records"""
+    numeric = distribution.get("type") == "numeric"
+    expanded = {}
+    for key, value in distribution.items():
+        if key == "counts":
+            continue
+        if key == "edges":
+            expanded["histogram"] = [
+                {
+                    "range": f"{value[i]:.2f} - {value[i + 1]:.2f}",
+                    "count": count,
+                    "min": value[i],
+                    "max": value[i + 1]
+                }
+                for i, count in enumerate(distribution["counts"])
+            ]
+        elif key == "values" and not numeric and "counts" in distribution:
+            expanded["values"] = [{"value": item, "count": count}
+                                  for item, count in zip(value, distribution["counts"])]
+        else:
+            expanded[key] = value
+    return expanded
+
+def compact_distribution(distribution: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn per-bin or per-value records into compact edges/counts arrays"""
+    compact = {}
+    for key, value in distribution.items():
+        if key == "histogram":
+            compact["edges"] = [entry["min"] for entry in value] + ([value[-1]["max"]] if value else [])
+            compact["counts"] = [entry["count"] for entry in value]
+        elif key == "values":
+            compact["values"] = [entry["value"] for entry in value]
+            compact["counts"] = [entry["count"] for entry in value]
+        else:
+            compact[key] = value
+    return compact
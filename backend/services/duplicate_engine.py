@@ -0,0 +1,74 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.parallel import column_executor
+from services.sketches import mix64
+
+# Key shared by every null, which duplicated() treats as equal to each other
+NULL_KEY = np.uint64(0x9E3779B97F4A7C15)
+
+def column_keys(series: pd.Series) -> np.ndarray:
+    """64-bit keys of a column's values: values comparing equal, and all nulls, share a key.
+
+    Keys are only comparable within the series they were computed from.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind == "f":
+        # Adding zero turns -0.0 into 0.0, which compares equal to it
+        keys = (series.to_numpy().astype(np.float64) + 0.0).view(np.uint64)
+        nulls = np.isnan(series.to_numpy())
+    elif isinstance(dtype, np.dtype) and dtype.kind in "iub":
+        return series.to_numpy().astype(np.int64, copy=False).view(np.uint64)
+    else:
+        # Codes follow duplicated()'s notion of equality, with nulls coded -1
+        codes, _ = pd.factorize(series)
+        keys = codes.astype(np.int64, copy=False).view(np.uint64)
+        nulls = codes < 0
+    if nulls.any():
+        keys = keys.copy()
+        keys[nulls] = NULL_KEY
+    return keys
+
+def row_hashes(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """64-bit hashes of rows over the given columns; equal rows always hash equally"""
+    combined = np.zeros(len(df), dtype=np.uint64)
+    for keys in column_executor.map(lambda col: column_keys(df[col]), columns):
+        # Mixing after every column makes the hash depend on column order
+        combined = mix64(combined + keys)
+    return combined
+
+def duplicate_groups(df: pd.DataFrame, columns: List[str],
+                     hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Groups of identical rows as CSR arrays: row positions ordered by group, and group offsets.
+
+    Rows sharing a hash are only candidates; their values are checked against the first
+    row of the group, so hash collisions never merge different rows. Groups are ordered
+    by their first row.
+    """
+    candidates = np.flatnonzero(pd.Series(hashes).duplicated(keep=False).to_numpy())
+    if len(candidates) == 0:
+        return np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+
+    # Codes follow the first appearance of each hash
+    group_ids, _ = pd.factorize(hashes[candidates])
+    firsts = np.empty(group_ids.max() + 1, dtype=np.int64)
+    firsts[group_ids[::-1]] = np.arange(len(group_ids))[::-1]
+    leaders = firsts[group_ids]
+    for col in columns:
+        keys = column_keys(df[col].iloc[candidates])
+        if not np.array_equal(keys, keys[leaders]):
+            # A collision - group the candidates on their values instead
+            group_ids = df.iloc[candidates][columns].groupby(columns, dropna=False, sort=False,
+                                                             observed=True).ngroup().to_numpy()
+            break
+
+    order = np.argsort(group_ids, kind="stable")
+    sizes = np.bincount(group_ids)
+    kept = sizes[group_ids[order]] > 1
+    positions = candidates[order][kept]
+    kept_sizes = sizes[sizes > 1]
+    offsets = np.zeros(len(kept_sizes) + 1, dtype=np.int64)
+    np.cumsum(kept_sizes, out=offsets[1:])
+    return positions.astype(np.int64), offsets
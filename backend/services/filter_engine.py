@@ -0,0 +1,162 @@
+import re
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+TEXT_OPERATORS = ("=", "!=", "in", "not in", "contains", "starts with", "ends with")
+COMPARISON_OPERATORS = (">", "<", ">=", "<=")
+FILTER_OPERATORS = TEXT_OPERATORS + COMPARISON_OPERATORS
+
+# Characters that can make a contains pattern more than a literal substring
+_REGEX_CHARACTERS = set(".^$*+?{}[]\\|()")
+
+_COMPARISONS = {">": np.greater, "<": np.less, ">=": np.greater_equal, "<=": np.less_equal}
+
+def request_filters(body: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Filter conditions of a request, also accepting the older single column/operator/value form"""
+    filters = body.get("filters") or []
+    if not filters and body.get("column") and body.get("value") is not None:
+        filters = [{"column": body["column"], "operator": body.get("operator", "="), "value": body["value"]}]
+    return filters
+
+def compile_filters(filters: List[Dict[str, Any]]) -> List[Tuple[Any, str, Any]]:
+    """(column, operator, value) conditions to apply, with values converted for their operator.
+
+    Conditions missing a column or value, or with an unknown operator, are left out. Raises
+    ValueError when a comparison's value is not a number.
+    """
+    conditions = []
+    for item in filters:
+        column = item.get("column")
+        operator = item.get("operator", "=")
+        value = item.get("value")
+        if not column or value is None or operator not in FILTER_OPERATORS:
+            continue
+        if operator in COMPARISON_OPERATORS:
+            try:
+                value = float(value)
+            except (ValueError, TypeError):
+                raise ValueError(f"Comparison value for {column} is not a number: {value!r}")
+        elif operator in ("in", "not in"):
+            # A list of values, or a comma separated string of them
+            if isinstance(value, str):
+                value = [item.strip() for item in value.split(",")]
+            else:
+                value = [str(item) for item in (value if isinstance(value, list) else [value])]
+        else:
+            value = str(value)
+        conditions.append((column, operator, value))
+    return conditions
+
+def _plain_numbers(series: pd.Series) -> bool:
+    # Columns whose values print exactly as the equal float64 does
+    return isinstance(series.dtype, np.dtype) and (series.dtype.kind in "iu" or series.dtype == np.float64)
+
+def _numeric_equal(values: np.ndarray, text: str) -> Optional[np.ndarray]:
+    """Rows whose printed value is text, or None when only comparing the text tells"""
+    try:
+        number = float(text)
+    except ValueError:
+        return np.zeros(len(values), dtype=bool)
+    if number == 0:
+        # 0.0 and -0.0 are equal but print differently
+        return None
+    if np.isnan(number):
+        candidates = np.isnan(values) if values.dtype.kind == "f" else np.zeros(len(values), dtype=bool)
+    else:
+        candidates = values == number
+    printed = pd.Series(np.unique(values[candidates])).astype(str)
+    if (printed == text).all():
+        return candidates
+    if not (printed == text).any():
+        return np.zeros(len(values), dtype=bool)
+    return None
+
+def _condition_mask(series: pd.Series, operator: str, value: Any, string_view: Callable[[], pd.Series],
+                    index: Callable[[str], Any], rows: Optional[np.ndarray]) -> np.ndarray:
+    if operator in COMPARISON_OPERATORS:
+        sorted_index = index("sorted")
+        if sorted_index is not None:
+            return sorted_index.mask(operator, value, rows)
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iufb":
+            values = series.to_numpy()
+            return _COMPARISONS[operator](values if rows is None else values[rows], value)
+        # Other types compare as pandas does, raising for ones that cannot compare to numbers
+        values = series if rows is None else series.iloc[rows]
+        return _COMPARISONS[operator](values, value).to_numpy(dtype=bool, na_value=False)
+
+    if operator in ("=", "!=", "in", "not in"):
+        equality_index = index("equality")
+        if equality_index is not None:
+            equal = equality_index.mask(value if isinstance(value, list) else [value], rows)
+            return equal if operator in ("=", "in") else ~equal
+
+    if operator in ("=", "!=") and _plain_numbers(series):
+        values = series.to_numpy()
+        equal = _numeric_equal(values if rows is None else values[rows], value)
+        if equal is not None:
+            return equal if operator == "=" else ~equal
+
+    if operator in ("contains", "starts with", "ends with"):
+        equality_index = index("equality")
+        if equality_index is not None:
+            # Match the distinct values, then map them to rows
+            return equality_index.select(_distinct_text_hits(equality_index.printed, operator, value,
+                                                             index("trigram")), rows)
+
+    view = string_view()
+    if rows is not None:
+        view = view.iloc[rows]
+    if operator == "=":
+        return view.to_numpy() == value
+    if operator == "!=":
+        return view.to_numpy() != value
+    if operator in ("in", "not in"):
+        found = view.isin(value).to_numpy()
+        return found if operator == "in" else ~found
+    return _text_matches(view, operator, value)
+
+def _text_matches(texts: pd.Series, operator: str, value: str) -> np.ndarray:
+    if operator == "contains":
+        matched = texts.str.contains(value, case=False, na=False)
+    elif operator == "starts with":
+        matched = texts.str.startswith(value, na=False)
+    else:
+        matched = texts.str.endswith(value, na=False)
+    return matched.to_numpy(dtype=bool)
+
+def _distinct_text_hits(printed: pd.Index, operator: str, value: str, trigrams: Any) -> np.ndarray:
+    """Flags of the distinct values matching a text operator, checking only trigram candidates if indexed"""
+    candidates = None
+    # contains takes a regular expression; only literal patterns narrow by trigrams
+    if trigrams is not None and not (operator == "contains" and _REGEX_CHARACTERS.intersection(value)):
+        candidates = trigrams.candidates(value)
+    if candidates is None:
+        return _text_matches(pd.Series(printed, dtype=object), operator, value)
+    hits = np.zeros(len(printed), dtype=bool)
+    hits[candidates] = _text_matches(pd.Series(printed[candidates], dtype=object), operator, value)
+    return hits
+
+def filter_positions(df: pd.DataFrame, filters: List[Dict[str, Any]], string_view: Callable[[Any], pd.Series],
+                     column_index: Optional[Callable[[Any, str], Any]] = None) -> np.ndarray:
+    """Positions of the rows matching every filter, without copying the frame.
+
+    Each condition only looks at the rows kept by the ones before it. Text operators read
+    string_view(column), the column printed as text; comparisons, and equality on numeric
+    columns, work on the values. column_index(column, kind) supplies equality and sorted
+    indexes that answer those operators without a scan, or None where there is none.
+    Raises ValueError for a condition on an unknown column, comparing a column that does not
+    hold numbers, or matching an invalid pattern.
+    """
+    rows: Optional[np.ndarray] = None
+    for column, operator, value in compile_filters(filters):
+        if column not in df.columns:
+            raise ValueError(f"Column not found: {column}")
+        index = (lambda kind: column_index(column, kind)) if column_index is not None else (lambda kind: None)
+        try:
+            keep = _condition_mask(df[column], operator, value, lambda: string_view(column), index, rows)
+        except (TypeError, re.error) as e:
+            raise ValueError(f"Cannot apply {operator} to column {column}: {str(e)}")
+        rows = np.flatnonzero(keep) if rows is None else rows[keep]
+    return np.arange(len(df)) if rows is None else rows
@@ -0,0 +1,224 @@
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.parallel import column_executor
+
+GROUPBY_FUNCS = ("count", "sum", "mean", "min", "max", "median", "nunique", "std")
+# Funcs that only need the order of a column's values, answered from sorted factorized codes
+_CODED_FUNCS = {"count", "min", "max", "nunique"}
+
+def group_index(df: pd.DataFrame, keys: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Group rows by key columns as CSR arrays: row positions in group order, group offsets, first rows.
+
+    Groups are numbered in sorted key order, like groupby(sort=True); rows with a missing key
+    belong to no group.
+    """
+    codes = np.zeros(len(df), dtype=np.int64)
+    missing = np.zeros(len(df), dtype=bool)
+    for key in keys:
+        key_codes, uniques = pd.factorize(df[key], sort=True)
+        missing |= key_codes < 0
+        codes = codes * max(len(uniques), 1) + np.maximum(key_codes, 0)
+        # Renumber the key combinations in order, so codes stay below the row count
+        codes = pd.factorize(codes, sort=True)[0]
+
+    kept = np.flatnonzero(~missing)
+    groups = pd.factorize(codes[kept], sort=True)[0]
+    order = kept[np.argsort(groups, kind="stable")]
+    offsets = np.zeros(groups.max() + 2 if len(groups) else 1, dtype=np.int64)
+    np.cumsum(np.bincount(groups), out=offsets[1:])
+    return order, offsets, order[offsets[:-1]]
+
+def groupby_request(body: Dict[str, Any]) -> Tuple[Tuple[str, ...], List[Tuple[Optional[str], str, str]]]:
+    """Key columns and (column, func, output name) aggregates of a request.
+
+    Takes group_by with a list of {column, func} aggregates, where a missing column counts
+    rows, or the older single group_column, agg_column and agg_func.
+    """
+    keys = body.get("group_by")
+    if keys:
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        aggregates = []
+        for item in body.get("aggregates") or [{"func": "count"}]:
+            column, func = (item.get("column"), item.get("func", "mean")) if isinstance(item, dict) else item
+            aggregates.append((column, func, "count" if column is None else f"{column}_{func}"))
+        return tuple(keys), aggregates
+
+    group_column = body.get("group_column")
+    if not group_column:
+        return (), []
+    agg_func = body.get("agg_func", "mean")
+    if agg_func == "count":
+        return (group_column,), [(None, "count", "count")]
+    # Functions the single aggregate form did not offer have always meant mean
+    if agg_func not in ("sum", "mean", "min", "max"):
+        agg_func = "mean"
+    return (group_column,), [(body.get("agg_column"), agg_func, body.get("agg_column"))]
+
+def _numeric_aggregates(values: np.ndarray, offsets: np.ndarray, funcs: List[str]) -> Dict[str, np.ndarray]:
+    # values are in group order and every group holds at least one row; sums, means and the
+    # within-group sort are shared by the funcs needing them
+    starts = offsets[:-1]
+    sizes = np.diff(offsets)
+    floats = values.dtype.kind == "f"
+    present = ~np.isnan(values) if floats else np.ones(len(values), dtype=bool)
+    counts = np.add.reduceat(present.astype(np.int64), starts)
+    shared: Dict[str, np.ndarray] = {}
+
+    def sums() -> np.ndarray:
+        if "sums" not in shared:
+            shared["sums"] = np.add.reduceat(np.where(present, values, 0) if floats else values, starts)
+        return shared["sums"]
+
+    def means() -> np.ndarray:
+        if "means" not in shared:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                shared["means"] = sums() / counts
+        return shared["means"]
+
+    def ordered() -> np.ndarray:
+        # Each group's values sorted, missing ones last
+        if "ordered" not in shared:
+            shared["ordered"] = values[np.lexsort((values, np.repeat(np.arange(len(starts)), sizes)))]
+        return shared["ordered"]
+
+    found = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for func in funcs:
+            if func == "count":
+                found[func] = counts
+            elif func == "sum":
+                found[func] = sums()
+            elif func == "mean":
+                found[func] = means()
+            elif func == "std":
+                # Second pass over the deviations, steadier than summing squares
+                deviations = np.where(present, values - np.repeat(means(), sizes), 0.0)
+                squares = np.add.reduceat(deviations * deviations, starts)
+                # Like pandas' ddof=1, undefined below two values
+                found[func] = np.sqrt(np.where(counts >= 2, squares / np.maximum(counts - 1, 1), np.nan))
+            elif func in ("min", "max"):
+                if floats:
+                    reduce = np.fmin if func == "min" else np.fmax
+                else:
+                    reduce = np.minimum if func == "min" else np.maximum
+                found[func] = reduce.reduceat(values, starts)
+            elif func == "median":
+                last = len(values) - 1
+                low = ordered()[np.minimum(starts + (counts - 1) // 2, last)]
+                high = ordered()[np.minimum(starts + counts // 2, last)]
+                found[func] = np.where(counts > 0, (low.astype(np.float64) + high) / 2, np.nan)
+            else:
+                changes = np.ones(len(values), dtype=np.int64)
+                changes[1:] = ordered()[1:] != ordered()[:-1]
+                changes[starts] = 1
+                if floats:
+                    changes[np.isnan(ordered())] = 0
+                found[func] = np.add.reduceat(changes, starts)
+    return found
+
+def _coded_aggregates(codes: np.ndarray, uniques: Any, offsets: np.ndarray, funcs: List[str]) -> Dict[str, Any]:
+    # Codes numbered in sorted value order stand in for the values, missing ones as NaN
+    coded = codes.astype(np.float64)
+    coded[codes < 0] = np.nan
+    found = _numeric_aggregates(coded, offsets, funcs)
+    for func in ("min", "max"):
+        if func in found:
+            positions = np.nan_to_num(found[func], nan=-1).astype(np.int64)
+            found[func] = pd.api.extensions.take(np.asarray(uniques), positions, allow_fill=True)
+    return found
+
+def aggregate_groups(df: pd.DataFrame, order: np.ndarray, offsets: np.ndarray,
+                     aggregates: List[Tuple[Optional[str], str]]) -> List[Any]:
+    """Aggregate every (column, func) over the groups, a column per task; a None column counts rows.
+
+    Integer and float columns are gathered into group order once and reduced for all their
+    funcs; other types fall back to pandas, grouping by the group numbers rather than the keys.
+    """
+    sizes = np.diff(offsets)
+    for column, func in aggregates:
+        if func not in GROUPBY_FUNCS:
+            raise ValueError(f"Unsupported aggregate: {func}")
+        if column is None and func != "count":
+            raise ValueError(f"Aggregate {func} needs a column")
+    columns = list(dict.fromkeys(column for column, _ in aggregates if column is not None))
+
+    def aggregate(column: str) -> Dict[str, Any]:
+        funcs = list(dict.fromkeys(func for col, func in aggregates if col == column))
+        series = df[column]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iuf":
+            return _numeric_aggregates(series.to_numpy()[order], offsets, funcs)
+        if set(funcs) <= _CODED_FUNCS:
+            try:
+                codes, uniques = pd.factorize(series, sort=True)
+            except TypeError:
+                # Values that do not sort together, like numbers mixed with text
+                codes = None
+            if codes is not None:
+                return _coded_aggregates(codes[order], uniques, offsets, funcs)
+        grouped = series.take(order).reset_index(drop=True).groupby(np.repeat(np.arange(len(sizes)), sizes),
+                                                                    sort=True)
+        found = {}
+        for func in funcs:
+            try:
+                found[func] = grouped.agg(func).reindex(range(len(sizes))).to_numpy()
+            except TypeError:
+                raise ValueError(f"Cannot compute {func} of column {column}")
+        return found
+
+    results = column_executor.map_columns(aggregate, columns)
+    return [sizes if column is None else results[column][func] for column, func in aggregates]
+
+def group_table(df: pd.DataFrame, keys: Tuple[str, ...], aggregates: List[Tuple[Optional[str], str, str]],
+                index: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> pd.DataFrame:
+    """Key columns of every group, from a group index of them, and a column per (column, func, name) aggregate"""
+    columns = list(keys) + [column for column, _, _ in aggregates if column is not None]
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"Columns not found: {', '.join(map(str, missing))}")
+    order, offsets, firsts = index
+    result = df[list(keys)].take(firsts).reset_index(drop=True)
+    values = aggregate_groups(df, order, offsets, [(column, func) for column, func, _ in aggregates])
+    for (_, _, name), found in zip(aggregates, values):
+        result[name] = found
+    return result
+
+def group_rows(df: pd.DataFrame, keys: Tuple[str, ...], index: Tuple[np.ndarray, np.ndarray, np.ndarray],
+               take_rows: Callable[[np.ndarray], pd.DataFrame], group: Optional[int] = None,
+               values: Optional[Tuple[str, ...]] = None, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """A page of one group's rows, picked by its number or by its key values printed as text.
+
+    df holds the key columns and take_rows(positions) reads the page's rows. Raises KeyError
+    when no group matches.
+    """
+    order, offsets, firsts = index
+    group_count = len(offsets) - 1
+    if group is None:
+        if values is None or len(values) != len(keys):
+            raise ValueError("Give a group number or one value per key column")
+        # Only each group's first row needs comparing, not every row
+        matched = np.ones(group_count, dtype=bool)
+        for key, value in zip(keys, values):
+            matched &= df[key].take(firsts).astype(str).to_numpy() == value
+        found = np.flatnonzero(matched)
+        if len(found) == 0:
+            raise KeyError(f"No group with values {', '.join(values)}")
+        group = int(found[0])
+    elif not 0 <= group < group_count:
+        raise KeyError(f"Group {group} not found")
+
+    rows = order[offsets[group]:offsets[group + 1]]
+    page = rows[offset:offset + limit]
+    return {
+        "group_by": list(keys),
+        "group": group,
+        # Records hold Python values, where a row of mixed types would hold numpy scalars
+        "keys": df[list(keys)].take([firsts[group]]).to_dict('records')[0],
+        "total": len(rows),
+        "offset": offset,
+        "limit": limit,
+        "positions": page.tolist(),
+        "rows": take_rows(page).to_dict('records')
+    }
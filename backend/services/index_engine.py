@@ -0,0 +1,193 @@
+import os
+import threading
+from typing import Dict, List, Any, Callable, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+INDEX_KINDS = ("equality", "sorted", "trigram")
+
+# Distinct values a column needs before substring filters build a trigram index over them
+TRIGRAM_MIN_VALUES = int(os.environ.get("DATA_INSIGHT_TRIGRAM_MIN_VALUES", "10000"))
+
+# Side of the sorted values a comparison's first or last match falls on
+_SEARCH_SIDES = {">": "right", ">=": "left", "<": "left", "<=": "right"}
+
+class EqualityIndex:
+    """Factorized codes of a column with every distinct value printed as text.
+
+    Answers =, != and in by comparing the distinct values, then mapping the hits back to
+    rows through the codes, so a lookup costs one gather rather than a string scan.
+    """
+
+    def __init__(self, codes: np.ndarray, printed: pd.Index):
+        self.codes = codes
+        self.printed = printed
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + int(self.printed.memory_usage(deep=True))
+
+    def mask(self, texts: List[str], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows, or the given row positions, whose printed value is one of texts"""
+        return self.select(self.printed.isin(texts), rows)
+    
+    def select(self, hits: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows, or the given row positions, holding a distinct value flagged in hits"""
+        return hits[self.codes if rows is None else self.codes[rows]]
+
+class SortedIndex:
+    """Permutation sorting a numeric column, answering range comparisons by binary search"""
+
+    def __init__(self, order: np.ndarray, values: np.ndarray, valid: int):
+        self.order = order
+        # Floats keep their own type, integers become float64, as numpy compares them to a float bound
+        self.values = values
+        self.valid = valid
+
+    @property
+    def nbytes(self) -> int:
+        return self.order.nbytes + self.values.nbytes
+
+    def mask(self, operator: str, bound: float, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows, or the given row positions, whose value compares true against bound"""
+        selected = np.zeros(len(self.order), dtype=bool)
+        with np.errstate(over="ignore"):
+            bound = np.asarray(bound, dtype=self.values.dtype)
+        if not np.isnan(bound):
+            cut = np.searchsorted(self.values[:self.valid], bound, side=_SEARCH_SIDES[operator])
+            # Missing values sort last and never match
+            selected[self.order[cut:self.valid] if operator in (">", ">=") else self.order[:cut]] = True
+        return selected if rows is None else selected[rows]
+
+class TrigramIndex:
+    """Inverted index from the lowercase trigrams of a column's distinct values to those values.
+
+    Narrows a substring lookup to the distinct values holding every trigram of the pattern,
+    which the caller then checks. Values that are not ASCII, whose case folding trigrams
+    cannot capture, are always candidates.
+    """
+
+    def __init__(self, keys: np.ndarray, offsets: np.ndarray, postings: np.ndarray, others: np.ndarray):
+        self.keys = keys
+        self.offsets = offsets
+        self.postings = postings
+        self.others = others
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.offsets.nbytes + self.postings.nbytes + self.others.nbytes
+
+    def candidates(self, pattern: str) -> Optional[np.ndarray]:
+        """Sorted ids of the distinct values that may contain pattern, ignoring case; None if any may"""
+        lowered = pattern.lower()
+        if len(lowered) < 3 or not lowered.isascii():
+            return None
+        grams = np.unique([ord(lowered[i]) << 16 | ord(lowered[i + 1]) << 8 | ord(lowered[i + 2])
+                           for i in range(len(lowered) - 2)])
+        slots = np.searchsorted(self.keys, grams)
+        found = slots < len(self.keys)
+        found[found] = self.keys[slots[found]] == grams[found]
+        if not found.all():
+            # Some trigram is in no ASCII value
+            return self.others
+        # Intersect the shortest postings first
+        lists = sorted((self.postings[self.offsets[slot]:self.offsets[slot + 1]] for slot in slots), key=len)
+        found = lists[0]
+        for ids in lists[1:]:
+            found = np.intersect1d(found, ids, assume_unique=True)
+        return np.union1d(found, self.others)
+
+def trigram_index(printed: pd.Index) -> TrigramIndex:
+    """Build a trigram index over distinct printed values, in one vectorized pass over their bytes"""
+    lowered = pd.Series(printed.to_numpy(), dtype=object).str.lower()
+    ascii_values = lowered.map(str.isascii).to_numpy(dtype=bool)
+    ids = np.flatnonzero(ascii_values)
+    encoded = b"".join(value.encode("ascii") for value in lowered.to_numpy()[ids])
+    lengths = lowered.str.len().to_numpy()[ids]
+    buffer = np.frombuffer(encoded, dtype=np.uint8).astype(np.int64)
+
+    # A trigram starts at every byte at least three from the end of its value
+    ends = np.repeat(np.cumsum(lengths), lengths)
+    starts = np.flatnonzero(np.arange(len(buffer)) + 3 <= ends)
+    grams = buffer[starts] << 16 | buffer[starts + 1] << 8 | buffer[starts + 2]
+    owners = np.repeat(ids, lengths)[starts]
+    pairs = np.sort(grams << 32 | owners)
+    id_type = np.int32 if len(printed) < np.iinfo(np.int32).max else np.int64
+    others = np.flatnonzero(~ascii_values)
+    if len(pairs) == 0:
+        # No ASCII value is three characters long, so every lookup falls back to the others
+        return TrigramIndex(np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64),
+                            np.empty(0, dtype=id_type), others)
+    pairs = pairs[np.append(True, pairs[1:] != pairs[:-1])]
+
+    # Postings of each trigram are a run of the sorted pairs
+    trigrams = pairs >> 32
+    firsts = np.flatnonzero(np.append(True, trigrams[1:] != trigrams[:-1]))
+    keys = trigrams[firsts]
+    offsets = np.append(firsts, len(pairs))
+    postings = (pairs & 0xFFFFFFFF).astype(id_type)
+    return TrigramIndex(keys, offsets, postings, others)
+
+def equality_index(series: pd.Series, string_view: Callable[[], pd.Series]) -> EqualityIndex:
+    """Build an equality index, printing each distinct value as the column's string view does"""
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind == "f":
+        # Factorize the bits, as 0.0 and -0.0 print differently, with every NaN alike
+        values = series.to_numpy()
+        bits = values.view(np.dtype(f"i{dtype.itemsize}")).copy()
+        bits[np.isnan(values)] = np.array(np.nan, dtype=dtype).view(bits.dtype)
+        codes, uniques = pd.factorize(bits)
+        printed = pd.Series(uniques.view(dtype)).astype(str)
+    elif isinstance(dtype, np.dtype) and dtype.kind in "iub":
+        codes, uniques = pd.factorize(series.to_numpy())
+        printed = pd.Series(uniques).astype(str)
+    else:
+        # Other types print depending on the whole column, so factorize the printed values
+        codes, uniques = pd.factorize(string_view())
+        printed = pd.Series(uniques, dtype=object)
+    smallest = np.int32 if len(printed) < np.iinfo(np.int32).max else np.int64
+    return EqualityIndex(codes.astype(smallest), pd.Index(printed.to_numpy(), dtype=object))
+
+def sorted_index(series: pd.Series) -> Optional[SortedIndex]:
+    """Build a sorted index of an integer or float column, or None for other types"""
+    dtype = series.dtype
+    if not (isinstance(dtype, np.dtype) and dtype.kind in "iuf"):
+        return None
+    values = series.to_numpy()
+    order = np.argsort(values, kind="stable")
+    ordered = values[order] if dtype.kind == "f" else values[order].astype(np.float64)
+    valid = len(ordered) - int(np.isnan(ordered).sum())
+    return SortedIndex(order, ordered, valid)
+
+class ColumnIndexes:
+    """Lazily built secondary indexes of a dataset's columns, keyed by table, column and kind.
+
+    Shared by every view of the processor that built them; their memory counts towards the
+    session budget and they are dropped, to be rebuilt on demand, when the dataset spills.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[str, Hashable, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, Hashable, str], build: Callable[[], Any]) -> Any:
+        """Get an index, building it on first use; None when the column cannot have one"""
+        with self._lock:
+            if key in self._indexes:
+                return self._indexes[key]
+        index = build()
+        with self._lock:
+            return self._indexes.setdefault(key, index)
+
+    def memory_usage(self) -> int:
+        """Bytes held by the built indexes"""
+        with self._lock:
+            return sum(index.nbytes for index in self._indexes.values() if index is not None)
+
+    def clear(self) -> int:
+        """Drop every index; returns bytes freed"""
+        freed = self.memory_usage()
+        with self._lock:
+            self._indexes.clear()
+        return freed
@@ -0,0 +1,55 @@
+import hashlib
+from typing import Dict, Any, BinaryIO, Optional
+
+CHUNK_SIZE = 65536
+
+# Leading bytes of the binary formats we accept
+FILE_SIGNATURES = {
+    b'PK\x03\x04': '.xlsx',                        # Office Open XML (zip container)
+    b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1': '.xls',   # Legacy Excel (OLE2 compound file)
+    b'%PDF': '.pdf',
+}
+
+# Extensions that may legitimately hold each sniffed container
+COMPATIBLE_EXTENSIONS = {
+    '.xlsx': {'.xlsx', '.xls'},
+    '.xls': {'.xls', '.xlsx'},
+    '.pdf': {'.pdf'},
+}
+
+def sniff_extension(head: bytes) -> Optional[str]:
+    """Detect the file format from its leading bytes, None for plain text"""
+    for signature, extension in FILE_SIGNATURES.items():
+        if head.startswith(signature):
+            return extension
+    return None
+
+def stream_to_disk(source: BinaryIO, file_path: str, declared_ext: str) -> Dict[str, Any]:
+    """Copy an upload to disk, hashing and sniffing the bytes as they are written"""
+    hasher = hashlib.md5()
+    size = 0
+    head = b''
+
+    with open(file_path, "wb") as buffer:
+        chunk = source.read(CHUNK_SIZE)
+        while chunk:
+            if len(head) < 8:
+                head += chunk[:8 - len(head)]
+            hasher.update(chunk)
+            buffer.write(chunk)
+            size += len(chunk)
+            chunk = source.read(CHUNK_SIZE)
+
+    detected_ext = sniff_extension(head)
+    if detected_ext is None:
+        # No binary signature - only text formats are acceptable
+        extension_matches = declared_ext == '.csv'
+    else:
+        extension_matches = declared_ext in COMPATIBLE_EXTENSIONS[detected_ext]
+
+    return {
+        "file_hash": hasher.hexdigest(),
+        "size_bytes": size,
+        "detected_extension": detected_ext,
+        "extension_matches": extension_matches
+    }
@@ -0,0 +1,90 @@
+import os
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+from services.session_registry import SessionRegistry, session_registry
+
+# Parsing runs off the event loop on a small bounded pool
+INGEST_WORKERS = int(os.environ.get("DATA_INSIGHT_INGEST_WORKERS", "2"))
+
+# Finished jobs kept around for status polling
+MAX_FINISHED_JOBS = 100
+
+class JobManager:
+    """Runs ingestion work on a bounded worker pool and tracks its progress.
+
+    Job state is written through to the registry so any worker process can report it.
+    """
+
+    def __init__(self, max_workers: int = INGEST_WORKERS,
+                 registry: Optional[SessionRegistry] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._registry = registry
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., Dict[str, Any]], *args, **fields) -> str:
+        """Queue func(job_id, *args) and return the new job id"""
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "state": "queued",
+                "progress": 0,
+                "message": "Waiting for a worker",
+                "result": None,
+                "error": None,
+                "created_at": datetime.now(),
+                "finished_at": None,
+                **fields
+            }
+            self._persist(job_id)
+            self._prune()
+        self._executor.submit(self._run, job_id, func, args)
+        return job_id
+
+    def update(self, job_id: str, **fields):
+        """Update the tracked state of a job"""
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+                self._persist(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a snapshot of a job's state"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        # Submitted on another worker process
+        return self._registry.load_job(job_id) if self._registry is not None else None
+
+    def _run(self, job_id: str, func: Callable[..., Dict[str, Any]], args: tuple):
+        self.update(job_id, state="running", progress=5, message="Processing")
+        try:
+            result = func(job_id, *args)
+            self.update(job_id, state="completed", progress=100, message="Completed",
+                        result=result, finished_at=datetime.now())
+        except Exception as e:
+            print(f"Job {job_id} failed: {str(e)}")
+            print(f"Traceback: {traceback.format_exc()}")
+            self.update(job_id, state="failed", message="Failed", error=str(e),
+                        finished_at=datetime.now())
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job["finished_at"] is not None]
+        if len(finished) > MAX_FINISHED_JOBS:
+            finished.sort(key=lambda job: job["finished_at"])
+            for job in finished[:len(finished) - MAX_FINISHED_JOBS]:
+                del self._jobs[job["job_id"]]
+                if self._registry is not None:
+                    self._registry.delete_job(job["job_id"])
+
+    def _persist(self, job_id: str):
+        if self._registry is not None:
+            self._registry.save_job(self._jobs[job_id])
+
+ingest_jobs = JobManager(registry=session_registry)
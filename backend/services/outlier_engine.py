@@ -0,0 +1,89 @@
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.parallel import column_executor
+from services.stats_engine import sorted_quantiles, STATS_BLOCK_COLUMNS
+
+OUTLIER_METHODS = ("iqr", "zscore", "mad")
+
+IQR_FACTOR = 1.5
+ZSCORE_THRESHOLD = 3.0
+# Modified z-score cutoff, scaling the MAD to a normal standard deviation
+MAD_THRESHOLD = 3.5
+MAD_SCALE = 0.6745
+
+def _block_bounds(values: np.ndarray, counts: np.ndarray, method: str,
+                  quartiles: Optional[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if method == "iqr":
+            if quartiles is None:
+                ordered = np.sort(values, axis=0)
+                found = sorted_quantiles(ordered, counts, [0.25, 0.75])
+                quartiles = found[0.25], found[0.75]
+            q1, q3 = quartiles
+            iqr = q3 - q1
+            return q1 - IQR_FACTOR * iqr, q3 + IQR_FACTOR * iqr
+
+        if method == "zscore":
+            means = np.nansum(values, axis=0) / counts
+            deviations = values - means
+            stds = np.sqrt(np.nansum(deviations * deviations, axis=0) / (counts - 1))
+            # Constant columns have no outliers by this measure
+            stds[~(stds > 0)] = np.nan
+            return means - ZSCORE_THRESHOLD * stds, means + ZSCORE_THRESHOLD * stds
+
+        medians = sorted_quantiles(np.sort(values, axis=0), counts, [0.5])[0.5]
+        spreads = sorted_quantiles(np.sort(np.abs(values - medians), axis=0), counts, [0.5])[0.5]
+        spreads[~(spreads > 0)] = np.nan
+        scale = MAD_THRESHOLD * spreads / MAD_SCALE
+        return medians - scale, medians + scale
+
+def detect_outliers(df: pd.DataFrame, columns: List[str], method: str = "iqr",
+                    quartiles: Optional[Dict[str, Tuple[float, float]]] = None) -> Dict[str, Dict[str, Any]]:
+    """Outlier bounds and counts of numeric columns, a block of columns at a time.
+
+    Bounds come from one sort per block (IQR, MAD) or from the moments (z-score), and
+    outliers are counted with a boolean reduction over the block. Columns without
+    outliers are left out. quartiles supplies precomputed IQR quartiles, skipping the sort.
+    """
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"Unsupported outlier method: {method}")
+
+    def block_outliers(block: List[str]) -> Dict[str, Dict[str, Any]]:
+        values = df[block].to_numpy(dtype="float64", na_value=np.nan)
+        counts = (~np.isnan(values)).sum(axis=0)
+        known = None
+        if quartiles is not None:
+            known = tuple(np.array([quartiles.get(col, (np.nan, np.nan))[i] for col in block], dtype="float64")
+                          for i in (0, 1))
+        lower, upper = _block_bounds(values, counts, method, known)
+        # NaN values and NaN bounds both compare false, so neither counts
+        outlier_counts = ((values < lower) | (values > upper)).sum(axis=0)
+        return {
+            col: {
+                "count": int(outlier_counts[j]),
+                "percentage": float(outlier_counts[j] / counts[j] * 100),
+                "lower_bound": float(lower[j]),
+                "upper_bound": float(upper[j])
+            }
+            for j, col in enumerate(block) if outlier_counts[j] > 0
+        }
+
+    outliers = {}
+    for found in column_executor.map(block_outliers, column_executor.partition(columns, STATS_BLOCK_COLUMNS)):
+        outliers.update(found)
+    return {col: outliers[col] for col in columns if col in outliers}
+
+def outlier_positions(series: pd.Series, method: str = "iqr") -> Tuple[np.ndarray, Optional[float], Optional[float]]:
+    """Positions of a column's outliers in row order, with the bounds that define them"""
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"Unsupported outlier method: {method}")
+    values = series.to_numpy(dtype="float64", na_value=np.nan)[:, None]
+    counts = (~np.isnan(values)).sum(axis=0)
+    if counts[0] == 0:
+        return np.empty(0, dtype=np.int64), None, None
+    lower, upper = _block_bounds(values, counts, method, None)
+    positions = np.flatnonzero((values[:, 0] < lower[0]) | (values[:, 0] > upper[0]))
+    return positions, float(lower[0]), float(upper[0])
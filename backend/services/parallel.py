@@ -0,0 +1,41 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Iterable, Optional, TypeVar
+
+# Threads analyzing columns at once per worker process; 1 runs everything inline
+ANALYSIS_WORKERS = int(os.environ.get("DATA_INSIGHT_ANALYSIS_WORKERS", str(os.cpu_count() or 1)))
+
+T = TypeVar("T")
+
+class ColumnExecutor:
+    """Shared pool that runs independent per-column work and keeps results in column order.
+
+    Threads read the same frames - memory-mapped Arrow buffers - so nothing is copied or
+    pickled, and the numpy kernels doing the heavy lifting release the GIL. Tasks must not
+    submit work to the executor themselves, since they would wait on their own pool.
+    """
+
+    def __init__(self, max_workers: int = ANALYSIS_WORKERS):
+        self.max_workers = max(1, max_workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if self.max_workers > 1:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analysis")
+
+    def map(self, func: Callable[[Any], T], items: Iterable[Any]) -> List[T]:
+        """Apply func to every item, in parallel when there is more than one"""
+        items = list(items)
+        if self._pool is None or len(items) < 2:
+            return [func(item) for item in items]
+        return list(self._pool.map(func, items))
+
+    def partition(self, columns: List[str], max_size: int) -> List[List[str]]:
+        """Split columns into blocks of at most max_size, smaller when needed so every worker gets one"""
+        size = max(1, min(max_size, -(-len(columns) // self.max_workers)))
+        return [columns[start:start + size] for start in range(0, len(columns), size)]
+
+    def map_columns(self, func: Callable[[str], T], columns: Iterable[str]) -> Dict[str, T]:
+        """Apply func to every column, merged into a dict in the original column order"""
+        columns = list(columns)
+        return dict(zip(columns, self.map(func, columns)))
+
+column_executor = ColumnExecutor()
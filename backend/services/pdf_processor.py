@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Iterator, Optional, Tuple, Union
 from pathlib import Path
 import json
 from datetime import datetime
@@ -8,6 +8,11 @@ import hashlib
 import io
 import logging
 
+from services.correlation_engine import strongest_pairs, CORRELATION_MODES
+from services.distribution_engine import compact_distribution
+from services.filter_engine import filter_positions
+from services.groupby_engine import group_index, group_table, group_rows
+
 # PDF processing libraries
 try:
     import pdfplumber
@@ -29,6 +34,8 @@ def convert_numpy_types(obj):
     """Convert numpy types to Python native types for JSON serialization"""
     if isinstance(obj, np.integer):
         return int(obj)
+    elif isinstance(obj, np.bool_):
+        return bool(obj)
     elif isinstance(obj, np.floating):
         # Handle NaN and Inf values
         if np.isnan(obj) or np.isinf(obj):
@@ -49,15 +56,18 @@ def convert_numpy_types(obj):
         return obj
 
 class PDFProcessor:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, file_hash: Optional[str] = None):
         if not PDF_LIBRARIES_AVAILABLE:
             raise ImportError("PDF processing libraries are not installed. Please install PyPDF2, pdfplumber, tabula-py, and camelot-py[cv]")
         
         self.file_path = Path(file_path)
         self.df: Optional[pd.DataFrame] = None
         self.tables: List[pd.DataFrame] = []  # For multiple tables in PDF
-        self.file_hash = self._generate_file_hash()
+        # Uploads are hashed while streamed to disk; only hash here when not supplied
+        self.file_hash = file_hash or self._generate_file_hash()
         self.extraction_method = None
+        self._footprint: Optional[int] = None
+        self._group_indexes: Dict[Tuple[str, ...], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
         self._load_data()
     
     def _generate_file_hash(self) -> str:
@@ -237,8 +247,15 @@ class PDFProcessor:
             "table_count": len(self.tables)
         }
     
-    def get_column_stats(self) -> Dict[str, Any]:
-        """Get detailed statistics for each column"""
+    def memory_footprint(self) -> int:
+        """Get the bytes held in memory by the extracted tables"""
+        if self._footprint is None:
+            # Extracted tables never change, so measure them once
+            self._footprint = int(sum(table.memory_usage(deep=True).sum() for table in self.tables))
+        return self._footprint
+    
+    def get_column_stats(self, approximate: bool = False) -> Dict[str, Any]:
+        """Get detailed statistics for each column; extracted tables are small, so approximate is ignored"""
         if self.df is None or self.df.empty:
             return {}
         
@@ -299,10 +316,13 @@ class PDFProcessor:
         
         return stats
     
-    def get_correlations(self) -> Dict[str, Any]:
-        """Get correlation matrix for numeric columns"""
+    def get_correlations(self, method: str = "pearson", mode: str = "matrix",
+                         top_k: Optional[int] = None, threshold: float = 0.0) -> Dict[str, Any]:
+        """Get correlations of numeric columns as a nested matrix, a compact array matrix or the strongest pairs"""
         if self.df is None or self.df.empty:
             return {}
+        if mode not in CORRELATION_MODES:
+            raise ValueError(f"Unsupported correlation mode: {mode}")
         
         # Select only numeric columns
         numeric_df = self.df.select_dtypes(include=[np.number])
@@ -312,14 +332,27 @@ class PDFProcessor:
             return {"message": "Not enough numeric columns for correlation analysis"}
         
         # Calculate correlation matrix using Pandas
-        corr_matrix = numeric_df.corr()
+        matrix = numeric_df.corr(method=method).to_numpy()
+        
+        if mode == "pairs":
+            return {
+                "method": method,
+                "columns": numeric_cols,
+                "pairs": strongest_pairs(numeric_cols, matrix, top_k, threshold)
+            }
+        if mode == "compact":
+            return {
+                "method": method,
+                "columns": numeric_cols,
+                "values": [[None if np.isnan(value) else float(value) for value in row] for row in matrix]
+            }
         
         # Convert to dictionary format
         correlations = {}
-        for col1 in numeric_cols:
+        for i, col1 in enumerate(numeric_cols):
             correlations[col1] = {}
-            for col2 in numeric_cols:
-                corr_value = corr_matrix.loc[col1, col2]
+            for j, col2 in enumerate(numeric_cols):
+                corr_value = matrix[i, j]
                 correlations[col1][col2] = float(corr_value) if not pd.isna(corr_value) else 0.0
         
         return {
@@ -331,6 +364,69 @@ class PDFProcessor:
         """Alias for get_correlations for compatibility with DataProcessor"""
         return self.get_correlations()
     
+    def filter_rows(self, filters: List[Dict[str, Any]]) -> np.ndarray:
+        """Positions of the rows matching every filter condition"""
+        return filter_positions(self.df, filters, lambda column: self.df[column].astype(str))
+    
+    def row_count(self) -> int:
+        """Rows of the extracted table"""
+        return len(self.df)
+    
+    def take_rows(self, positions: np.ndarray, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Rows of the extracted table at the given positions, with all or the given columns"""
+        if columns is not None:
+            missing = [col for col in columns if col not in self.df.columns]
+            if missing:
+                raise ValueError(f"Columns not found: {', '.join(map(str, missing))}")
+        return (self.df if columns is None else self.df[columns]).take(positions)
+    
+    def iter_rows(self, positions: Optional[np.ndarray] = None,
+                  columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Rows of the extracted table at the given positions, or all of them; the table is small, so one batch"""
+        if positions is None:
+            yield self.df if columns is None else self.take_rows(np.arange(len(self.df)), columns)
+        else:
+            yield self.take_rows(positions, columns)
+    
+    def duplicate_mask(self, columns: Optional[Tuple[str, ...]] = None,
+                       rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Mark rows repeating an earlier row over all columns or the given ones, among all rows or the given positions"""
+        if columns is not None:
+            missing = [col for col in columns if col not in self.df.columns]
+            if missing:
+                raise ValueError(f"Columns not found: {', '.join(map(str, missing))}")
+        frame = self.df if rows is None else self.df.take(rows)
+        return frame.duplicated(subset=list(columns) if columns else None).to_numpy()
+    
+    def get_group_index(self, keys: Tuple[str, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Rows of every group of the key columns, as CSR arrays with each group's first row"""
+        if not keys:
+            raise ValueError("No group columns given")
+        missing = [col for col in keys if col not in self.df.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {', '.join(map(str, missing))}")
+        if keys not in self._group_indexes:
+            # Extracted tables never change, so each grouping is kept
+            self._group_indexes[keys] = group_index(self.df, list(keys))
+        return self._group_indexes[keys]
+    
+    def group_by(self, keys: Tuple[str, ...],
+                 aggregates: List[Tuple[Optional[str], str, str]]) -> pd.DataFrame:
+        """Aggregate (column, func, name) triples per group of the key columns, one output column each"""
+        return group_table(self.df, keys, aggregates, self.get_group_index(tuple(keys)))
+    
+    def get_group_rows(self, keys: Tuple[str, ...], group: Optional[int] = None,
+                       values: Optional[Tuple[str, ...]] = None, columns: Optional[Tuple[str, ...]] = None,
+                       offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """Get a page of one group's rows, picked by its number in the group-by result or by its key values as text"""
+        index = self.get_group_index(tuple(keys))
+        projected = list(columns) if columns else None
+        missing = [col for col in projected or [] if col not in self.df.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {', '.join(map(str, missing))}")
+        return convert_numpy_types(group_rows(self.df, keys, index, lambda page: self.take_rows(page, projected),
+                                              group, values, offset, limit))
+    
     def get_data_sample(self, n: int = 100) -> List[Dict]:
         """Get a sample of the data"""
         if self.df is None or self.df.empty:
@@ -395,12 +491,12 @@ class PDFProcessor:
             "extraction_successful": len(self.tables) > 0
         }
     
-    def detect_patterns_and_anomalies(self) -> Dict[str, Any]:
+    def detect_patterns_and_anomalies(self, approximate: bool = False) -> Dict[str, Any]:
         """Detect patterns and anomalies in the data - alias for detect_patterns"""
-        return self.detect_patterns()
+        return self.detect_patterns(approximate=approximate)
     
-    def detect_patterns(self) -> Dict[str, Any]:
-        """Detect patterns and anomalies in the data"""
+    def detect_patterns(self, approximate: bool = False) -> Dict[str, Any]:
+        """Detect patterns and anomalies in the data; always exact, approximate is ignored"""
         if self.df is None or self.df.empty:
             return {}
         
@@ -449,17 +545,20 @@ class PDFProcessor:
         
         return patterns
     
-    def get_value_distributions(self) -> Dict[str, Any]:
-        """Get distributions for all columns"""
+    def get_value_distributions(self, approximate: bool = False, columns: Optional[Tuple[str, ...]] = None,
+                                compact: bool = False) -> Dict[str, Any]:
+        """Get distributions for all columns or only the given ones; always exact, approximate is ignored"""
         if self.df is None or self.df.empty:
             return {}
+        selected = self.df.columns if columns is None else [col for col in columns if col in self.df.columns]
         distributions = {}
-        for col in self.df.columns:
-            distributions[col] = self.get_value_distribution(col)
+        for col in selected:
+            distribution = self.get_value_distribution(col)
+            distributions[col] = compact_distribution(distribution) if compact else distribution
         return distributions
     
-    def get_value_distribution(self, column: str, bins: int = 20) -> Dict[str, Any]:
-        """Get distribution of values for a column"""
+    def get_value_distribution(self, column: str, bins: int = 20, approximate: bool = False) -> Dict[str, Any]:
+        """Get distribution of values for a column; always exact, approximate is ignored"""
         if self.df is None or self.df.empty or column not in self.df.columns:
             return {}
         
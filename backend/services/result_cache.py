@@ -0,0 +1,98 @@
+import os
+import json
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, Optional, Tuple
+
+import pandas as pd
+
+# Memory for cached analysis results before the least recently used are evicted
+RESULT_CACHE_MB = float(os.environ.get("DATA_INSIGHT_RESULT_CACHE_MB", "64"))
+
+_MISSING = object()
+
+def _result_size(value: Any) -> int:
+    # Approximate size by the JSON the result will be served as, unless it reports its own
+    if isinstance(value, pd.Series):
+        # nbytes only counts the pointers of object columns
+        return int(value.memory_usage(deep=True))
+    if hasattr(value, "nbytes"):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(_result_size(item) for item in value)
+    return len(json.dumps(value, default=str))
+
+class ResultCache:
+    """Size-bounded LRU of analysis results keyed by dataset hash, sheet, method and arguments.
+
+    Datasets are immutable once uploaded, so entries only need to go when the dataset is
+    deleted or space runs out. Cached results are shared - callers must not mutate them.
+    """
+
+    def __init__(self, max_mb: float = RESULT_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple, default=None) -> Any:
+        """Get a cached result, marking it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Tuple, value: Any):
+        """Store a result, evicting the least recently used entries beyond the size limit"""
+        size = _result_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def invalidate(self, file_hash: str):
+        """Drop every result computed from a dataset"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == file_hash]:
+                self._size -= self._entries.pop(key)[1]
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number and approximate bytes of cached results"""
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size}
+
+result_cache = ResultCache()
+
+def cached_result(method: Callable) -> Callable:
+    """Cache a processor method's result per dataset hash, active sheet and arguments"""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        file_hash: Optional[str] = getattr(self, "file_hash", None)
+        if not file_hash:
+            return method(self, *args, **kwargs)
+
+        # Bind defaults so f(x) and f(x, flag=False) share an entry
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = tuple(bound.arguments.items())[1:]
+        key: Tuple[Hashable, ...] = (file_hash, getattr(self, "active_sheet", None), method.__name__,
+                                     arguments)
+        result = result_cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = method(self, *args, **kwargs)
+            result_cache.put(key, result)
+        return result
+    return wrapper
@@ -0,0 +1,244 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
+from services.session_registry import SessionRegistry
+
+# RAM allowed for parsed frames across all sessions before the least recently used are spilled
+SESSION_MEMORY_BUDGET_MB = float(os.environ.get("DATA_INSIGHT_SESSION_MEMORY_MB", "1024"))
+
+# Sessions kept at all; beyond this the least recently used are deleted
+MAX_SESSIONS = int(os.environ.get("DATA_INSIGHT_MAX_SESSIONS", "50"))
+
+class SessionManager:
+    """Session store that keeps parsed frames within a memory budget.
+
+    Sessions are ordered by last access. When the frames held in memory exceed the
+    budget, the least recently used datasets are spilled to the columnar cache and
+    reloaded transparently the next time they are read.
+    
+    With a SessionRegistry the registry is the source of truth shared by every worker
+    process: sessions created elsewhere are picked up on first access, sessions deleted
+    elsewhere are forgotten, and sheet switches are followed. Sessions picked up from it
+    start without a processor; loader reattaches one on first access and releaser frees
+    it once the session is forgotten.
+    """
+
+    def __init__(self, memory_budget_mb: float = SESSION_MEMORY_BUDGET_MB,
+                 max_sessions: int = MAX_SESSIONS,
+                 registry: Optional[SessionRegistry] = None,
+                 loader: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 releaser: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.max_sessions = max_sessions
+        self._registry = registry
+        self._loader = loader
+        self._releaser = releaser
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __contains__(self, session_id: object) -> bool:
+        return self._lookup(session_id) is not None
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __getitem__(self, session_id: str) -> Dict[str, Any]:
+        session = self._lookup(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions.move_to_end(session_id)
+        
+        if session["processor"] is None:
+            # Restored after a restart or created by another worker - reattach the parsed data lazily
+            session["processor"] = self._loader(session)
+        
+        with self._lock:
+            self._enforce_budget(protect=session_id)
+        return session
+
+    def get(self, session_id: str, default=None) -> Optional[Dict[str, Any]]:
+        """Get a session, marking it as recently used"""
+        try:
+            return self[session_id]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        return [session_id for session_id, _ in self.items()]
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Snapshot of all sessions, without affecting their recency or attaching data"""
+        if self._registry is None:
+            with self._lock:
+                return list(self._sessions.items())
+        
+        stored = self._registry.load_all()
+        with self._lock:
+            return [(session["session_id"], self._sessions.get(session["session_id"], session))
+                    for session in stored]
+
+    def values(self) -> List[Dict[str, Any]]:
+        return [session for _, session in self.items()]
+
+    def add(self, session_id: str, session: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Register a session; returns the sessions dropped to stay under max_sessions"""
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            if self._registry is not None:
+                self._registry.save(session_id, session)
+            evicted = self._evict()
+            self._enforce_budget(protect=session_id)
+            return evicted
+
+    def pop(self, session_id: str) -> Dict[str, Any]:
+        """Remove a session"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if self._registry is not None:
+            if session is None:
+                # Only known to the worker that created it
+                session = self._registry.get(session_id)
+                if session is not None:
+                    session.pop("session_id")
+                    session["processor"] = None
+            self._registry.delete(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def set_active_sheet(self, session_id: str, sheet_name: Optional[str]):
+        """Persist the sheet a session switched to"""
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions[session_id]["active_sheet"] = sheet_name
+        if self._registry is not None:
+            self._registry.set_active_sheet(session_id, sheet_name)
+
+    def dataset_in_use(self, file_hash: str) -> bool:
+        """Check whether any session, on any worker, still references a dataset"""
+        if self._registry is not None:
+            return self._registry.file_for_hash(file_hash) is not None
+        with self._lock:
+            return any(session["file_hash"] == file_hash for session in self._sessions.values())
+
+    def dataset_file(self, file_hash: str) -> Optional[str]:
+        """Get the stored upload already holding a dataset's bytes, if any"""
+        if self._registry is not None:
+            return self._registry.file_for_hash(file_hash)
+        with self._lock:
+            for session in self._sessions.values():
+                if session["file_hash"] == file_hash:
+                    return session["file_path"]
+        return None
+
+    def restore(self) -> List[Dict[str, Any]]:
+        """Load sessions persisted by a previous run; their data is reattached on first access"""
+        if self._registry is None:
+            return []
+        
+        restored = []
+        with self._lock:
+            for session in self._registry.load_all():
+                session_id = session.pop("session_id")
+                if not os.path.exists(session["file_path"]):
+                    # Upload was removed while the server was down
+                    self._registry.delete(session_id)
+                    continue
+                session["processor"] = None
+                self._sessions[session_id] = session
+                restored.append(session)
+        return restored
+
+    def _lookup(self, session_id) -> Optional[Dict[str, Any]]:
+        """Find a session, reconciling the local copy with the registry"""
+        if self._registry is None:
+            with self._lock:
+                return self._sessions.get(session_id)
+        
+        stored = self._registry.get(session_id)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if stored is not None:
+                stored.pop("session_id")
+                if session is None:
+                    # Created by another worker
+                    stored["processor"] = None
+                    self._sessions[session_id] = stored
+                    return stored
+                if stored["active_sheet"] and stored["active_sheet"] != session.get("active_sheet"):
+                    # Switched on another worker
+                    session["active_sheet"] = stored["active_sheet"]
+                    if session["processor"] is not None and hasattr(session["processor"], "switch_sheet"):
+                        session["processor"].switch_sheet(stored["active_sheet"])
+                return session
+            if session is None:
+                return None
+            # Deleted by another worker
+            del self._sessions[session_id]
+        if self._releaser is not None:
+            self._releaser(session)
+        return None
+
+    def _evict(self) -> List[Dict[str, Any]]:
+        if self._registry is None:
+            evicted = []
+            while len(self._sessions) > self.max_sessions:
+                _, oldest = self._sessions.popitem(last=False)
+                evicted.append(oldest)
+            return evicted
+        
+        # Access order is per worker, so the shared limit drops the earliest uploads
+        excess = self._registry.count() - self.max_sessions
+        evicted = []
+        for session_id in self._registry.oldest(excess):
+            try:
+                evicted.append(self.pop(session_id))
+            except KeyError:
+                # Deleted concurrently by another worker
+                continue
+        return evicted
+
+    def memory_usage(self) -> int:
+        """Get the bytes of parsed frames currently held in memory"""
+        with self._lock:
+            return sum(self._footprint(processor) for _, processor in self._datasets())
+
+    def _datasets(self) -> List[Tuple[str, Any]]:
+        """One processor per distinct dataset, least recently used first"""
+        latest: Dict[str, Any] = {}
+        for session in reversed(self._sessions.values()):
+            if session["processor"] is None:
+                continue
+            key = session.get("file_hash") or str(id(session["processor"]))
+            if key not in latest:
+                latest[key] = session["processor"]
+        return list(reversed(latest.items()))
+
+    @staticmethod
+    def _footprint(processor) -> int:
+        return processor.memory_footprint() if hasattr(processor, "memory_footprint") else 0
+
+    def _enforce_budget(self, protect: Optional[str] = None):
+        datasets = self._datasets()
+        total = sum(self._footprint(processor) for _, processor in datasets)
+        if total <= self.memory_budget:
+            return
+
+        # Never spill the data of the session being served right now
+        protected = self._sessions[protect].get("file_hash") if protect in self._sessions else None
+        for key, processor in datasets:
+            if total <= self.memory_budget:
+                break
+            if key == protected or not hasattr(processor, "spill"):
+                continue
+            freed = processor.spill()
+            if freed:
+                total -= freed
+                print(f"Spilled dataset {key} to disk, freed {freed / 1024 / 1024:.2f} MB")
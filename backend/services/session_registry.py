@@ -0,0 +1,150 @@
+import os
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, Optional
+
+# Kept outside uploads/, which is served as static files
+SESSION_DB_PATH = os.environ.get("DATA_INSIGHT_SESSION_DB", "sessions.db")
+
+class SessionRegistry:
+    """SQLite store of session and job metadata shared by every worker process and across restarts"""
+
+    def __init__(self, db_path: str = SESSION_DB_PATH):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            # WAL lets workers read while another one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    file_type TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    active_sheet TEXT,
+                    basic_info TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_file_hash ON sessions (file_hash)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, session_id: str, session: Dict[str, Any]):
+        """Insert or replace a session's metadata"""
+        processor = session.get("processor")
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session_id,
+                    session["filename"],
+                    session["file_path"],
+                    session["file_hash"],
+                    session["file_type"],
+                    session["timestamp"].isoformat(),
+                    getattr(processor, "active_sheet", None),
+                    json.dumps(session["basic_info"], default=str)
+                )
+            )
+
+    def set_active_sheet(self, session_id: str, sheet_name: Optional[str]):
+        """Record the sheet a session is analyzing"""
+        with self._connect() as conn:
+            conn.execute("UPDATE sessions SET active_sheet = ? WHERE session_id = ?",
+                         (sheet_name, session_id))
+
+    def delete(self, session_id: str):
+        """Remove a session's metadata"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load a single session, if stored"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return self._to_session(row) if row is not None else None
+
+    def count(self) -> int:
+        """Count stored sessions"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def oldest(self, limit: int) -> List[str]:
+        """Get the ids of the earliest uploaded sessions"""
+        if limit <= 0:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute("SELECT session_id FROM sessions ORDER BY timestamp LIMIT ?",
+                                (limit,)).fetchall()
+        return [row["session_id"] for row in rows]
+
+    def file_for_hash(self, file_hash: str) -> Optional[str]:
+        """Get the stored upload holding the given bytes, if any session references it"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT file_path FROM sessions WHERE file_hash = ? LIMIT 1",
+                               (file_hash,)).fetchone()
+        return row["file_path"] if row is not None else None
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Load every stored session, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM sessions ORDER BY timestamp").fetchall()
+        return [self._to_session(row) for row in rows]
+
+    def save_job(self, job: Dict[str, Any]):
+        """Insert or replace a job's state"""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?)",
+                         (job["job_id"], json.dumps(job, default=str)))
+
+    def load_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load a job's state, if stored"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = json.loads(row["data"])
+        for field in ("created_at", "finished_at"):
+            if job.get(field):
+                job[field] = datetime.fromisoformat(job[field])
+        return job
+
+    def delete_job(self, job_id: str):
+        """Remove a job's state"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    @staticmethod
+    def _to_session(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "session_id": row["session_id"],
+            "filename": row["filename"],
+            "file_path": row["file_path"],
+            "file_hash": row["file_hash"],
+            "file_type": row["file_type"],
+            "timestamp": datetime.fromisoformat(row["timestamp"]),
+            "active_sheet": row["active_sheet"],
+            "basic_info": json.loads(row["basic_info"])
+        }
+
+session_registry = SessionRegistry()
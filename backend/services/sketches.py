@@ -0,0 +1,389 @@
+import math
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.parallel import column_executor
+from services.stats_engine import column_kind
+
+# Rows fed to the sketches at a time when profiling an in-memory frame
+PROFILE_CHUNK_ROWS = 262144
+
+def mix64(hashes: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spreads weak hashes (hash(5) == 5) over all 64 bits"""
+    z = hashes ^ (hashes >> np.uint64(30))
+    z = z * np.uint64(0xBF58476D1CE4E5B9)
+    z = z ^ (z >> np.uint64(27))
+    z = z * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """64-bit hashes of non-null values, the same in every process; objects hash as their text.
+
+    pd.util.hash_pandas_object hashes text with SipHash and numbers with a splitmix64 style
+    finalizer, so the hashes spread evenly over all 64 bits. HyperLogLog's error bound
+    assumes exactly that, so any replacement hash must spread as evenly.
+    """
+    if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) != "string":
+        # Hash the type too, as 1 and "1" print alike
+        values = pd.DataFrame({"value": values, "type": values.map(lambda value: type(value).__name__)})
+    return pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy()
+
+class HyperLogLog:
+    """Mergeable distinct count estimate with a relative standard error of 1.04 / sqrt(2^precision)"""
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    @property
+    def nbytes(self) -> int:
+        return self.registers.nbytes
+
+    def update(self, values: pd.Series):
+        """Add the values of a series, which must not contain nulls"""
+        if len(values) == 0:
+            return
+        self.update_hashes(hash_values(values))
+
+    def update_hashes(self, hashes: np.ndarray):
+        """Add precomputed 64-bit hashes"""
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        # The remaining bits fit a float exactly, and frexp returns their bit length
+        rest = (hashes & np.uint64((1 << width) - 1)).astype(np.float64)
+        _, bit_length = np.frexp(rest)
+        rank = (width - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog"):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * math.log(m / zeros)
+        return float(raw)
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang, Liberty) holding O(k) items per level.
+
+    Items at level h stand for 2^h inputs. Each level is kept sorted, so compacting a
+    level is a strided slice and merging levels only interleaves two sorted runs.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.min = math.nan
+        self.max = math.nan
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def rank_error(self) -> float:
+        """Normalized rank error at about 99% confidence; zero while nothing was compacted"""
+        if len(self.levels) == 1:
+            return 0.0
+        # Empirical bound published for KLL by the Apache DataSketches project
+        return 2.296 / self.k ** 0.9723
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self.levels)
+
+    def update(self, values: np.ndarray):
+        """Add numeric values; NaNs are ignored"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.min = np.fmin(self.min, values.min())
+        self.max = np.fmax(self.max, values.max())
+        self.levels[0] = self._merge_sorted(self.levels[0], np.sort(values))
+        self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        if other.n == 0:
+            return
+        self.n += other.n
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = self._merge_sorted(self.levels[level], items)
+        self._compress()
+
+    def quantiles(self, qs: List[float]) -> List[Optional[float]]:
+        """Estimate the values at the given ranks (0 to 1)"""
+        if self.n == 0:
+            return [None for _ in qs]
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_), 1 << level, dtype=np.int64)
+                                  for level, items_ in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        results = []
+        for q in qs:
+            if q <= 0:
+                results.append(float(self.min))
+            elif q >= 1:
+                results.append(float(self.max))
+            else:
+                position = min(np.searchsorted(cumulative, q * cumulative[-1]), len(items) - 1)
+                results.append(float(items[position]))
+        return results
+
+    def _capacity(self, level: int) -> int:
+        # Lower levels get geometrically less room than the top one
+        depth = len(self.levels) - level - 1
+        return max(8, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level == len(self.levels) - 1:
+                    self.levels.append(np.empty(0))
+                # An odd item out stays behind; the rest are halved at a random offset
+                kept = items[:len(items) % 2]
+                promoted = items[len(kept):][self._rng.integers(2)::2]
+                self.levels[level] = kept
+                self.levels[level + 1] = self._merge_sorted(self.levels[level + 1], promoted)
+            level += 1
+
+    @staticmethod
+    def _merge_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        if len(a) == 0:
+            return b
+        if len(b) == 0:
+            return a
+        # Timsort detects the two sorted runs and merges them in linear time
+        return np.sort(np.concatenate([a, b]), kind="stable")
+
+class FrequentItems:
+    """Misra-Gries summary of the most frequent values.
+
+    Counters are keyed by value hash and keep one example of the value they count.
+    Reported counts never exceed the true ones and undercount by at most error.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+        self.labels: Dict[int, Any] = {}
+        self.error = 0
+        self.n = 0
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.counts.memory_usage(deep=True))
+
+    def update(self, values: pd.Series, hashes: Optional[np.ndarray] = None):
+        """Add the values of a series, which must not contain nulls"""
+        if len(values) == 0:
+            return
+        if hashes is None:
+            hashes = hash_values(values)
+        self.update_counts(values.to_numpy(), np.ones(len(values), dtype=np.int64), hashes)
+
+    def update_counts(self, examples: np.ndarray, counts: np.ndarray, hashes: np.ndarray):
+        """Add values seen counts times each, with their hashes; a value may appear more than once"""
+        # Counting integer hashes is much faster than hashing the values themselves again
+        codes, keys = pd.factorize(hashes)
+        totals = np.bincount(codes, weights=counts, minlength=len(keys)).astype(np.int64)
+        first_seen = np.empty(len(keys), dtype=np.intp)
+        # Later writes win, so writing in reverse leaves each key's first position
+        first_seen[codes[::-1]] = np.arange(len(codes) - 1, -1, -1)
+        self._add(pd.Series(totals, index=keys))
+        self.n += int(totals.sum())
+
+        positions = pd.Series(first_seen, index=keys)
+        self.labels = {key: self.labels[key] if key in self.labels else examples[positions[key]]
+                       for key in self.counts.index}
+
+    def merge(self, other: "FrequentItems"):
+        self._add(other.counts)
+        self.labels = {key: self.labels.get(key, other.labels.get(key)) for key in self.counts.index}
+        self.error += other.error
+        self.n += other.n
+
+    def top(self, limit: int) -> List[Tuple[Any, int]]:
+        top = self.counts.sort_values(ascending=False, kind="stable").head(limit)
+        return [(self.labels[key], int(count)) for key, count in top.items()]
+
+    def _add(self, counts: pd.Series):
+        merged = counts if self.counts.empty else self.counts.add(counts, fill_value=0)
+        if len(merged) > self.capacity:
+            # Decrement every counter by the (capacity + 1)-th largest count
+            threshold = merged.nlargest(self.capacity + 1).iloc[-1]
+            merged = merged[merged > threshold] - threshold
+            self.error += int(threshold)
+        self.counts = merged.astype("int64")
+
+class ColumnProfile:
+    """Streaming profile of one column: exact counts, moments and extremes plus sketches"""
+
+    def __init__(self, name: str, dtype):
+        self.name = name
+        self.dtype = str(dtype)
+        self.kind = column_kind(dtype)
+        self.rows = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        # Running mean and sum of squared deviations, merged with Chan's formula
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.true_count = 0
+        self.distinct = HyperLogLog() if self.kind != "boolean" else None
+        self.quantiles = KLLSketch() if self.kind == "numeric" else None
+        self.frequent = FrequentItems() if self.kind == "categorical" else None
+
+    @property
+    def nbytes(self) -> int:
+        sketches = (self.distinct, self.quantiles, self.frequent)
+        return sum(sketch.nbytes for sketch in sketches if sketch is not None)
+
+    def update(self, series: pd.Series):
+        """Add a chunk of the column"""
+        if self.kind == "categorical":
+            self._update_categorical(series)
+            return
+        values = series.dropna()
+        self.rows += len(series)
+        self.nulls += len(series) - len(values)
+        if len(values) == 0:
+            return
+
+        if self.kind == "boolean":
+            self.true_count += int(values.astype(bool).sum())
+            self.count += len(values)
+            return
+
+        hashes = hash_values(values)
+        self.distinct.update_hashes(hashes)
+        if self.kind == "numeric":
+            numbers = values.to_numpy(dtype=np.float64)
+            self._add_moments(len(numbers), float(numbers.mean()),
+                              float(((numbers - numbers.mean()) ** 2).sum()))
+            self.quantiles.update(numbers)
+            self._add_extremes(float(numbers.min()), float(numbers.max()))
+        else:
+            self.count += len(values)
+            if self.kind == "categorical":
+                self.frequent.update(values, hashes)
+            elif self.kind == "datetime":
+                self._add_extremes(values.min(), values.max())
+
+    def _update_categorical(self, series: pd.Series):
+        # One factorize finds the nulls, the distinct values and their counts, so only the
+        # distinct values are hashed; repeats would not change the distinct count sketch
+        codes, uniques = pd.factorize(series)
+        counts = np.bincount(codes + 1, minlength=len(uniques) + 1)
+        self.rows += len(series)
+        self.nulls += int(counts[0])
+        if len(uniques) == 0:
+            return
+        examples = np.asarray(uniques, dtype=object)
+        hashes = hash_values(pd.Series(examples, dtype=object))
+        self.distinct.update_hashes(hashes)
+        self.count += len(series) - int(counts[0])
+        self.frequent.update_counts(examples, counts[1:], hashes)
+
+    def merge(self, other: "ColumnProfile"):
+        """Fold in the profile of another chunk of the same column"""
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.true_count += other.true_count
+        if self.kind == "numeric":
+            self._add_moments(other.count, other.mean, other.m2)
+        else:
+            self.count += other.count
+        if other.min is not None:
+            self._add_extremes(other.min, other.max)
+        for mine, theirs in ((self.distinct, other.distinct), (self.quantiles, other.quantiles),
+                             (self.frequent, other.frequent)):
+            if mine is not None:
+                mine.merge(theirs)
+
+    def distinct_count(self) -> int:
+        if self.kind == "boolean":
+            return int(self.true_count > 0) + int(self.count - self.true_count > 0)
+        if self.count == 0:
+            return 0
+        # Every present value is at least one distinct value, and there cannot be more than values
+        return int(min(max(round(self.distinct.estimate()), 1), self.count))
+
+    def std(self) -> Optional[float]:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None
+
+    def _add_moments(self, count: int, mean: float, m2: float):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def _add_extremes(self, low, high):
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+class FrameProfile:
+    """Column profiles of a whole table, built in one streaming pass over its rows"""
+
+    def __init__(self, columns: Dict[str, ColumnProfile]):
+        self.columns = columns
+
+    @property
+    def nbytes(self) -> int:
+        return sum(profile.nbytes for profile in self.columns.values())
+
+    @property
+    def rows(self) -> int:
+        return next(iter(self.columns.values())).rows if self.columns else 0
+
+    @classmethod
+    def empty(cls, dtypes: Dict[str, Any]) -> "FrameProfile":
+        return cls({col: ColumnProfile(col, dtype) for col, dtype in dtypes.items()})
+
+    def update(self, chunk: pd.DataFrame):
+        """Add a chunk of rows"""
+        for col, profile in self.columns.items():
+            profile.update(chunk[col])
+
+    def merge(self, other: "FrameProfile"):
+        for col, profile in self.columns.items():
+            profile.merge(other.columns[col])
+
+def profile_frame(df: pd.DataFrame, chunk_rows: int = PROFILE_CHUNK_ROWS) -> FrameProfile:
+    """Sketch every column of a frame, a column per task, reading numbers a chunk of rows at a time"""
+    profile = FrameProfile.empty(dict(zip(df.columns, df.dtypes)))
+
+    def sketch(col: str):
+        column = profile.columns[col]
+        if column.kind == "categorical":
+            # The whole column is in memory, so each distinct value is hashed once, not once per chunk
+            column.update(df[col])
+            return
+        for start in range(0, len(df), chunk_rows):
+            column.update(df[col].iloc[start:start + chunk_rows])
+
+    column_executor.map_columns(sketch, list(profile.columns))
+    return profile
@@ -0,0 +1,226 @@
+from typing import Dict, List, Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.parallel import column_executor
+
+QUANTILES = [0.25, 0.5, 0.75]
+
+# Most numeric columns sorted together; bounds the temporary copies to this many columns
+STATS_BLOCK_COLUMNS = 16
+
+def _optional_float(value) -> Optional[float]:
+    return None if pd.isna(value) else float(value)
+
+def column_kind(dtype) -> Optional[str]:
+    """Classify a dtype the way the analysis endpoints report it"""
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    if dtype == object or pd.api.types.is_string_dtype(dtype):
+        return "categorical"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    return None
+
+def _lerp(low: np.ndarray, high: np.ndarray, fraction: np.ndarray) -> np.ndarray:
+    # Same interpolation numpy uses for "linear" quantiles, so results match pandas
+    diff = high - low
+    return np.where(fraction >= 0.5, high - diff * (1 - fraction), low + diff * fraction)
+
+def sorted_quantiles(ordered: np.ndarray, counts: np.ndarray, qs: List[float]) -> Dict[float, np.ndarray]:
+    """Linear quantiles per column of a column-wise sorted block whose NaNs sort last"""
+    columns = np.arange(ordered.shape[1])
+    last = np.maximum(counts - 1, 0)
+    quantiles = {}
+    for q in qs:
+        position = q * last
+        low = np.floor(position).astype(int)
+        high = np.ceil(position).astype(int)
+        quantiles[q] = _lerp(ordered[low, columns].astype("float64"),
+                             ordered[high, columns].astype("float64"), position - low)
+    return quantiles
+
+def _block_summary(block: pd.DataFrame) -> Dict[str, Dict[str, Optional[float]]]:
+    """Moments, quartiles and distinct counts of a block of numeric columns from one sort"""
+    exact = all(isinstance(dtype, np.dtype) and dtype.kind in "iu" for dtype in block.dtypes)
+    if exact:
+        # Plain integer columns have no missing values and keep their exact ordering
+        values = block.to_numpy()
+        counts = np.full(values.shape[1], values.shape[0])
+    else:
+        values = block.to_numpy(dtype="float64", na_value=np.nan)
+        counts = (~np.isnan(values)).sum(axis=0)
+
+    rows = values.shape[0]
+    # NaNs sort last, so the first counts[j] entries of column j are its values in order
+    ordered = np.sort(values, axis=0)
+    present = counts > 0
+    last = np.maximum(counts - 1, 0)
+
+    floats = values.astype("float64", copy=False)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.nansum(floats, axis=0) / counts
+        deviations = floats - means
+        stds = np.sqrt(np.nansum(deviations * deviations, axis=0) / (counts - 1))
+    stds[counts < 2] = np.nan
+
+    quartiles = sorted_quantiles(ordered, counts, QUANTILES)
+
+    changes = ordered[1:] != ordered[:-1]
+    within = np.arange(rows - 1)[:, None] < last[None, :]
+    unique_counts = (changes & within).sum(axis=0) + present
+
+    summary = {}
+    for j, col in enumerate(block.columns):
+        if not present[j]:
+            summary[col] = {key: None for key in ("mean", "std", "min", "25%", "50%", "75%", "max")}
+        else:
+            summary[col] = {
+                "mean": _optional_float(means[j]),
+                "std": _optional_float(stds[j]),
+                "min": float(ordered[0, j]),
+                "25%": float(quartiles[0.25][j]),
+                "50%": float(quartiles[0.5][j]),
+                "75%": float(quartiles[0.75][j]),
+                "max": float(ordered[last[j], j])
+            }
+        summary[col]["unique_count"] = int(unique_counts[j])
+    return summary
+
+def numeric_summary(df: pd.DataFrame, columns: List[str]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Moments, quartiles and distinct counts of numeric columns, a block of columns at a time"""
+    groups: Dict[bool, List[str]] = {True: [], False: []}
+    for col in columns:
+        dtype = df[col].dtype
+        groups[isinstance(dtype, np.dtype) and dtype.kind in "iu"].append(col)
+
+    blocks = [block for cols in groups.values() for block in column_executor.partition(cols, STATS_BLOCK_COLUMNS)]
+    summary = {}
+    for block_summary in column_executor.map(lambda block: _block_summary(df[block]), blocks):
+        summary.update(block_summary)
+    return {col: summary[col] for col in columns}
+
+def compute_column_stats(df: pd.DataFrame,
+                         value_counts: Optional[Callable[[str], pd.Series]] = None) -> Dict[str, Dict[str, Any]]:
+    """Per-column statistics, sharing null counts and value counts between the reductions.
+
+    value_counts supplies the value counts of a column, so callers can share them.
+    """
+    if df is None or df.empty:
+        return {}
+    if value_counts is None:
+        value_counts = lambda col: df[col].value_counts()
+
+    row_count = len(df)
+    null_counts = df.isna().sum()
+    kinds = {col: column_kind(dtype) for col, dtype in zip(df.columns, df.dtypes)}
+    numeric_cols: List[str] = [col for col, kind in kinds.items() if kind == "numeric"]
+    numeric_stats = numeric_summary(df, numeric_cols)
+
+    def column_stats(col: str) -> Dict[str, Any]:
+        col_data = df[col]
+        kind = kinds[col]
+
+        # Distinct counts come out of the sort or value counts that are needed anyway
+        counts = value_counts(col) if kind in ("categorical", "boolean") else None
+        if kind == "numeric":
+            unique_count = numeric_stats[col].pop("unique_count")
+        elif counts is not None:
+            unique_count = len(counts)
+        else:
+            unique_count = int(col_data.nunique())
+        null_count = int(null_counts[col])
+
+        col_stats = {
+            "name": col,
+            "dtype": str(col_data.dtype),
+            "null_count": null_count,
+            "null_percentage": null_count / row_count * 100,
+            "unique_count": unique_count,
+            "unique_percentage": unique_count / row_count * 100
+        }
+
+        if kind == "numeric":
+            col_stats.update(numeric_stats[col])
+            col_stats["column_type"] = "numeric"
+        elif kind == "categorical":
+            col_stats.update({
+                "top_values": [{"value": str(idx), "count": int(count)}
+                               for idx, count in counts.head(10).items()],
+                "column_type": "categorical"
+            })
+        elif kind == "datetime":
+            col_stats.update({
+                "min": str(col_data.min()),
+                "max": str(col_data.max()),
+                "column_type": "datetime"
+            })
+        elif kind == "boolean":
+            col_stats.update({
+                "true_count": int(counts.get(True, 0)),
+                "false_count": int(counts.get(False, 0)),
+                "column_type": "boolean"
+            })
+        return col_stats
+
+    return column_executor.map_columns(column_stats, df.columns)
+
+def profile_column_stats(profile) -> Dict[str, Dict[str, Any]]:
+    """Per-column statistics from a sketch profile, in the shape of compute_column_stats plus error bounds"""
+    stats = {}
+    for col, column in profile.columns.items():
+        if column.rows == 0:
+            return {}
+        unique_count = column.distinct_count()
+        col_stats = {
+            "name": col,
+            "dtype": column.dtype,
+            "null_count": column.nulls,
+            "null_percentage": column.nulls / column.rows * 100,
+            "unique_count": unique_count,
+            "unique_percentage": unique_count / column.rows * 100
+        }
+        error_bounds = {}
+        if column.distinct is not None:
+            error_bounds["unique_count_relative"] = column.distinct.relative_error
+
+        if column.kind == "numeric":
+            q1, median, q3 = column.quantiles.quantiles(QUANTILES)
+            col_stats.update({
+                "mean": column.mean if column.count else None,
+                "std": column.std(),
+                "min": column.min,
+                "25%": q1,
+                "50%": median,
+                "75%": q3,
+                "max": column.max,
+                "column_type": "numeric"
+            })
+            error_bounds["quantile_rank"] = column.quantiles.rank_error
+        elif column.kind == "categorical":
+            col_stats.update({
+                "top_values": [{"value": str(value), "count": count}
+                               for value, count in column.frequent.top(10)],
+                "column_type": "categorical"
+            })
+            error_bounds["top_value_count"] = column.frequent.error
+        elif column.kind == "datetime":
+            col_stats.update({
+                "min": str(column.min) if column.min is not None else str(pd.NaT),
+                "max": str(column.max) if column.max is not None else str(pd.NaT),
+                "column_type": "datetime"
+            })
+        elif column.kind == "boolean":
+            col_stats.update({
+                "true_count": column.true_count,
+                "false_count": column.count - column.true_count,
+                "column_type": "boolean"
+            })
+
+        col_stats["error_bounds"] = error_bounds
+        stats[col] = col_stats
+
+    return stats
@@ -0,0 +1,100 @@
+import io
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# The app keeps uploads, the columnar cache and the session database under the working directory
+WORKDIR = tempfile.mkdtemp(prefix="data-insight-tests-")
+os.chdir(WORKDIR)
+os.environ.setdefault("DATA_INSIGHT_SESSION_DB", os.path.join(WORKDIR, "sessions.db"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from main import app
+from api.routers.upload import sessions
+from services.pdf_processor import PDFProcessor
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    return TestClient(app)
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "amount": rng.normal(size=300),
+        "qty": rng.integers(0, 10, 300),
+        "cat": rng.choice(["x", "y", "z"], 300),
+        "flag": rng.integers(0, 2, 300).astype(bool)
+    })
+    df.loc[3, "amount"] = np.nan
+    return df
+
+def upload(client: TestClient, name: str, data: bytes) -> str:
+    """Upload a file and wait for its processing job; returns the session id"""
+    response = client.post("/api/upload/", files={"file": (name, data)})
+    assert response.status_code in (200, 202), response.text
+    body = response.json()
+    if "job_id" in body:
+        for _ in range(400):
+            job = client.get(f"/api/upload/jobs/{body['job_id']}").json()
+            if job["state"] in ("completed", "failed"):
+                break
+            time.sleep(0.05)
+        assert job["state"] == "completed", job
+    return body["session_id"]
+
+def csv_bytes(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+@pytest.fixture
+def csv_session(client, frame) -> str:
+    return upload(client, f"{uuid.uuid4().hex}.csv", csv_bytes(frame))
+
+@pytest.fixture
+def pdf_session(frame) -> str:
+    """A PDF session holding frame as its extracted table, without needing the PDF libraries"""
+    processor = PDFProcessor.__new__(PDFProcessor)
+    processor.file_path = Path(WORKDIR) / "extracted.pdf"
+    processor.df = frame
+    processor.tables = [frame]
+    processor.file_hash = uuid.uuid4().hex
+    processor.extraction_method = "pdfplumber"
+    processor._footprint = None
+    processor._group_indexes = {}
+    session_id = str(uuid.uuid4())
+    sessions.add(session_id, {
+        "processor": processor,
+        "filename": "extracted.pdf",
+        "file_path": str(processor.file_path),
+        "file_hash": processor.file_hash,
+        "timestamp": datetime.now(),
+        "basic_info": processor.get_basic_info(),
+        "file_type": "pdf",
+        "active_sheet": None
+    })
+    yield session_id
+    if session_id in sessions:
+        sessions.pop(session_id)
+
+@pytest.fixture
+def streamed_session(client, frame, monkeypatch) -> str:
+    """A CSV ingested in 64 row batches, holding a 50 row sample in memory"""
+    from services import chunked_ingest
+    monkeypatch.setattr(chunked_ingest, "CHUNKED_CSV_MB", 0)
+    monkeypatch.setattr(chunked_ingest.ingest_csv, "__defaults__", (64, 50))
+    # Printing floats differently keeps the file apart from csv_session's, which shares its hash otherwise
+    buffer = io.BytesIO()
+    frame.to_csv(buffer, index=False, float_format="%.17g")
+    return upload(client, f"{uuid.uuid4().hex}.csv", buffer.getvalue())
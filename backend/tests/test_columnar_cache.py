@@ -0,0 +1,27 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from services.columnar_cache import ColumnarCache
+
+def test_concurrent_writes_of_one_table(tmp_path):
+    # Large enough that the writes overlap while Arrow releases the GIL
+    frame = pd.DataFrame({"value": np.arange(2_000_000, dtype=np.float64)})
+    cache = ColumnarCache(str(tmp_path))
+    barrier = threading.Barrier(8)
+    results = []
+    
+    def write():
+        barrier.wait()
+        for _ in range(3):
+            results.append(cache.write("dataset", "sheet", frame))
+    
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 24
+    pd.testing.assert_frame_equal(cache.read("dataset", "sheet"), frame)
+    assert not list(tmp_path.rglob("*.tmp"))
@@ -0,0 +1,32 @@
+import io
+
+import pandas as pd
+import pytest
+
+@pytest.fixture(params=["csv_session", "pdf_session"])
+def session(request):
+    return request.getfixturevalue(request.param)
+
+def test_filtered_export_drops_duplicates(client, session, frame):
+    response = client.post(f"/api/export/{session}/filtered", params={"drop_duplicates": True, "subset": "cat,qty"},
+                           json={"filters": [{"column": "flag", "operator": "=", "value": "True"}]})
+    assert response.status_code == 200, response.text
+    expected = frame[frame["flag"]].drop_duplicates(["cat", "qty"])
+    assert pd.read_csv(io.StringIO(response.text))["amount"].tolist() == pytest.approx(
+        expected["amount"].tolist(), nan_ok=True)
+
+@pytest.mark.parametrize("export_type", ["filter", "all"])
+def test_custom_export_drops_duplicates(client, session, frame, export_type):
+    response = client.post(f"/api/export/{session}/custom",
+                           json={"type": export_type, "filters": [], "drop_duplicates": True, "subset": ["cat"]})
+    assert response.status_code == 200, response.text
+    assert pd.read_csv(io.StringIO(response.text))["cat"].tolist() == frame["cat"].drop_duplicates().tolist()
+
+def test_export_rejects_unknown_subset(client, session):
+    response = client.post(f"/api/export/{session}/filtered", params={"drop_duplicates": True, "subset": "zz"},
+                           json={"filters": []})
+    assert response.status_code == 400
+
+def test_streamed_export_refuses_duplicates(client, streamed_session):
+    response = client.post(f"/api/export/{streamed_session}/custom", json={"type": "all", "drop_duplicates": True})
+    assert response.status_code == 400
@@ -0,0 +1,20 @@
+import pytest
+
+@pytest.fixture(params=["csv_session", "pdf_session", "streamed_session"])
+def session(request):
+    return request.getfixturevalue(request.param)
+
+def test_filter_counts_matches(client, session, frame):
+    response = client.post(f"/api/analysis/{session}/custom",
+                           json={"type": "filter", "filters": [{"column": "qty", "operator": ">=", "value": "7"},
+                                                               {"column": "cat", "operator": "in", "value": "x,y"}]})
+    assert response.status_code == 200, response.text
+    assert response.json()["rows_matched"] == int(((frame["qty"] >= 7) & frame["cat"].isin(["x", "y"])).sum())
+
+@pytest.mark.parametrize("operator", [">", "<", ">=", "<="])
+def test_non_numeric_comparison_is_rejected(client, session, operator):
+    filters = [{"column": "qty", "operator": operator, "value": "seven"}]
+    response = client.post(f"/api/analysis/{session}/custom", json={"type": "filter", "filters": filters})
+    assert response.status_code == 400
+    assert "not a number" in response.json()["detail"]
+    assert client.post(f"/api/export/{session}/filtered", json={"filters": filters}).status_code == 400
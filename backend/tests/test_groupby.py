@@ -0,0 +1,28 @@
+import pytest
+
+@pytest.fixture(params=["csv_session", "pdf_session"])
+def session(request):
+    return request.getfixturevalue(request.param)
+
+def test_group_rows_with_bool_key(client, session, frame):
+    response = client.get(f"/api/analysis/{session}/groups/rows", params={"group_by": "cat,flag", "group": 0})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    expected = frame[(frame["cat"] == body["keys"]["cat"]) & (frame["flag"] == body["keys"]["flag"])]
+    assert isinstance(body["keys"]["flag"], bool)
+    assert body["total"] == len(expected)
+
+def test_group_rows_by_printed_values(client, session, frame):
+    response = client.get(f"/api/analysis/{session}/groups/rows",
+                          params={"group_by": "cat,flag", "value": ["y", "True"]})
+    assert response.status_code == 200, response.text
+    assert response.json()["total"] == int(((frame["cat"] == "y") & frame["flag"]).sum())
+
+def test_custom_groupby_with_bool_key(client, session, frame):
+    response = client.post(f"/api/analysis/{session}/custom",
+                           json={"type": "groupby", "group_by": ["cat", "flag"],
+                                 "aggregates": [{"column": "amount", "func": "sum"}]})
+    assert response.status_code == 200, response.text
+    groups = {(row["cat"], row["flag"]): row["amount_sum"] for row in response.json()}
+    expected = frame.groupby(["cat", "flag"])["amount"].sum()
+    assert groups == pytest.approx({key: value for key, value in expected.items()})
@@ -0,0 +1,19 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from conftest import upload, csv_bytes
+
+def test_single_value_columns(client):
+    df = pd.DataFrame({
+        "constant": [7.0] * 49 + [np.nan],
+        "label": ["same"] * 50,
+        "varied": np.arange(50),
+        "empty": [np.nan] * 50
+    })
+    session_id = upload(client, f"{uuid.uuid4().hex}.csv", csv_bytes(df))
+    for approximate in (False, True):
+        patterns = client.get(f"/api/analysis/{session_id}/patterns", params={"approximate": approximate}).json()
+        assert patterns["data_quality"]["columns_with_single_value"] == [
+            col for col in df.columns if df[col].nunique() == 1]
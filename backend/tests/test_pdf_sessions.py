@@ -0,0 +1,46 @@
+import pytest
+
+@pytest.mark.parametrize("approximate", [False, True])
+def test_full_analysis(client, pdf_session, frame, approximate):
+    response = client.get(f"/api/analysis/{pdf_session}", params={"approximate": approximate})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["rows"] == len(frame)
+    assert set(body["distributions"]) == set(frame.columns)
+    assert [stats["column"] for stats in body["column_stats"]] == list(frame.columns)
+
+@pytest.mark.parametrize("method", ["pearson", "spearman"])
+def test_correlations(client, pdf_session, frame, method):
+    expected = frame[["amount", "qty"]].corr(method=method)
+    matrix = client.get(f"/api/analysis/{pdf_session}/correlations", params={"method": method}).json()
+    assert matrix["matrix"]["amount"]["qty"] == pytest.approx(expected.loc["amount", "qty"])
+    compact = client.get(f"/api/analysis/{pdf_session}/correlations",
+                         params={"method": method, "mode": "compact"}).json()
+    assert compact["columns"] == ["amount", "qty"] and compact["values"][0][0] == pytest.approx(1.0)
+    pairs = client.get(f"/api/analysis/{pdf_session}/correlations",
+                       params={"method": method, "mode": "pairs", "top_k": 1}).json()
+    assert len(pairs["pairs"]) == 1
+
+def test_correlations_reject_unknown_mode(client, pdf_session):
+    assert client.get(f"/api/analysis/{pdf_session}/correlations", params={"mode": "grid"}).status_code == 400
+
+@pytest.mark.parametrize("section", ["columns", "patterns", "distributions", "distribution/amount", "correlations"])
+def test_sections(client, pdf_session, section):
+    response = client.get(f"/api/analysis/{pdf_session}/{section}")
+    assert response.status_code == 200, response.text
+    assert client.get(f"/api/analysis/{pdf_session}/{section}",
+                      headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+def test_distributions_subset(client, pdf_session, frame):
+    full = client.get(f"/api/analysis/{pdf_session}/distributions").json()
+    compact = client.get(f"/api/analysis/{pdf_session}/distributions",
+                         params={"columns": "amount,cat", "compact": True}).json()
+    assert set(compact) == {"amount", "cat"}
+    assert compact["amount"]["counts"] == [entry["count"] for entry in full["amount"]["histogram"]]
+    assert sum(compact["cat"]["counts"]) == len(frame)
+
+def test_stream(client, pdf_session):
+    events = [line.split(": ", 1)[1] for line in client.get(f"/api/analysis/{pdf_session}/stream").text.splitlines()
+              if line.startswith("event: ")]
+    assert "failed" not in events
+    assert events[-1] == "done" and events.count("section") == 6
@@ -0,0 +1,58 @@
+import json
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from conftest import upload, csv_bytes
+from services.data_processor import DataProcessor
+from services.session_manager import SessionManager
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+# Starts the app in a fresh interpreter, as after a restart, and reads the given sessions back
+RESTART = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from fastapi.testclient import TestClient
+from main import app
+with TestClient(app) as client:
+    listed = {session["session_id"] for session in client.get("/api/sessions/").json()["sessions"]}
+    print(json.dumps({session_id: [session_id in listed, client.get(f"/api/analysis/{session_id}").json()["rows"]]
+                      for session_id in json.loads(sys.argv[2])}))
+"""
+
+def test_sessions_survive_restart(client, frame):
+    uploaded = [upload(client, f"{uuid.uuid4().hex}.csv", csv_bytes(frame.head(rows))) for rows in (120, 240)]
+    result = subprocess.run([sys.executable, "-c", RESTART, str(BACKEND), json.dumps(uploaded)],
+                            capture_output=True, text=True, cwd=os.getcwd(), env=os.environ.copy(), timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == {uploaded[0]: [True, 120], uploaded[1]: [True, 240]}
+
+def test_idle_datasets_spill_to_stay_in_budget(tmp_path):
+    rng = np.random.default_rng(1)
+    frames, processors = [], []
+    for i in range(2):
+        frames.append(pd.DataFrame({"value": rng.normal(size=20000), "label": rng.choice(["a", "b"], 20000)}))
+        path = tmp_path / f"{uuid.uuid4().hex}.csv"
+        path.write_bytes(csv_bytes(frames[-1]))
+        processors.append(DataProcessor(str(path)))
+    footprint = processors[0].memory_footprint()
+    assert footprint > 0
+    
+    # Room for one dataset but not two
+    manager = SessionManager(memory_budget_mb=1.5 * footprint / 1024 / 1024)
+    for i, processor in enumerate(processors):
+        manager.add(f"s{i}", {"processor": processor, "file_hash": processor.file_hash})
+    assert processors[0].memory_footprint() == 0
+    assert 0 < manager.memory_usage() <= manager.memory_budget
+    
+    # Reading the spilled session reloads it from the columnar cache; the next access spills the other
+    pd.testing.assert_frame_equal(manager["s0"]["processor"].df, frames[0], check_exact=False)
+    manager["s0"]
+    assert processors[1].memory_footprint() == 0 and processors[0].memory_footprint() > 0
+    assert manager.memory_usage() <= manager.memory_budget
@@ -0,0 +1,21 @@
+import io
+import uuid
+
+import pandas as pd
+
+from conftest import upload
+
+def test_full_comparison_reports_duplicate_keys(client, frame):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        frame.to_excel(writer, sheet_name="first", index=False)
+        frame.head(100).to_excel(writer, sheet_name="second", index=False)
+    session_id = upload(client, f"{uuid.uuid4().hex}.xlsx", buffer.getvalue())
+    request = {"sheet1": "first", "sheet2": "second", "key_columns": ["cat", "qty"]}
+    
+    summary = client.post(f"/api/sheets/{session_id}/compare/", json=request).json()
+    full = client.post(f"/api/sheets/{session_id}/compare/export/", json=request).json()
+    assert full["duplicate_keys"] == summary["summary"]["duplicate_keys"] == {
+        "sheet1": int(frame.duplicated(["cat", "qty"]).sum()),
+        "sheet2": int(frame.head(100).duplicated(["cat", "qty"]).sum())
+    }
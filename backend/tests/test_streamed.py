@@ -0,0 +1,45 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from api.routers.upload import sessions
+
+def test_iter_rows_reads_batches(streamed_session, frame):
+    processor = sessions[streamed_session]["processor"]
+    assert len(processor.df) == 50
+    positions = processor.filter_rows([{"column": "qty", "operator": ">=", "value": 5}])
+    batches = list(processor.iter_rows(positions))
+    assert len(batches) > 1
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True),
+                                  frame[frame["qty"] >= 5].reset_index(drop=True))
+
+def test_filtered_export(client, streamed_session, frame):
+    response = client.post(f"/api/export/{streamed_session}/filtered",
+                           json={"filters": [{"column": "cat", "operator": "=", "value": "x"}]})
+    assert response.status_code == 200, response.text
+    exported = pd.read_csv(io.StringIO(response.text))
+    assert exported["qty"].tolist() == frame.loc[frame["cat"] == "x", "qty"].tolist()
+
+def test_filtered_export_without_matches(client, streamed_session, frame):
+    response = client.post(f"/api/export/{streamed_session}/filtered",
+                           json={"filters": [{"column": "cat", "operator": "=", "value": "none"}]})
+    assert response.status_code == 200, response.text
+    assert response.text.strip() == ",".join(frame.columns)
+
+@pytest.mark.parametrize("format", ["csv", "json"])
+def test_custom_export_of_every_row(client, streamed_session, frame, format):
+    response = client.post(f"/api/export/{streamed_session}/custom", json={"type": "all", "format": format})
+    assert response.status_code == 200, response.text
+    exported = pd.read_csv(io.StringIO(response.text)) if format == "csv" else pd.DataFrame(json.loads(response.text))
+    assert exported["qty"].tolist() == frame["qty"].tolist()
+    assert exported["amount"].isna().tolist() == frame["amount"].isna().tolist()
+
+@pytest.mark.parametrize("session", ["csv_session", "streamed_session"])
+def test_outlier_rows_without_outliers(client, request, session):
+    # qty is uniform over 0-9, so nothing lies outside its IQR fences
+    session_id = request.getfixturevalue(session)
+    response = client.get(f"/api/analysis/{session_id}/outliers/qty/rows")
+    assert response.status_code == 200, response.text
+    assert response.json()["total"] == 0 and response.json()["rows"] == []